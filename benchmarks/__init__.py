@@ -0,0 +1,12 @@
+"""
+Micro-benchmarks for the hot paths of the dashboard.
+
+Run from the top of the repository:
+
+    python -m benchmarks                 # compare against baseline.json
+    python -m benchmarks -k catalog      # only the matching benchmarks
+    python -m benchmarks --save          # record a new baseline
+
+Catalogs come from a seeded generator (see `benchmarks.catalog`), so every
+run measures the same data.
+"""
@@ -0,0 +1,78 @@
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from benchmarks.catalog import SIZES
+from benchmarks.cases import CASES
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def measure(func, repeat):
+    """Best time per call, in seconds, over `repeat` runs of at least 0.2s each."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def humanize(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def benchmarks(sizes, keyword):
+    for name, sized, setup in CASES:
+        for size in sizes if sized else (None,):
+            full_name = f"{name}[{size}]" if size else name
+            if keyword and keyword not in full_name:
+                continue
+            yield full_name, (lambda setup=setup, size=size: setup(size) if size else setup())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the micro-benchmarks.")
+    parser.add_argument("-k", dest="keyword", help="only run benchmarks whose name contains this")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="catalog sizes, comma separated")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="flag benchmarks this many percent slower than the baseline"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        baseline = json.loads(args.baseline.read_text())
+    except FileNotFoundError:
+        baseline = {}
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    results = {}
+    regressions = []
+    for name, setup in benchmarks(sizes, args.keyword):
+        seconds = results[name] = measure(setup(), args.repeat)
+        line = f"{name:<55} {humanize(seconds):>10}"
+        if name in baseline:
+            delta = (seconds - baseline[name]) / baseline[name] * 100
+            line += f" {humanize(baseline[name]):>10} {delta:+7.1f}%"
+            if delta > args.threshold:
+                regressions.append(name)
+                line += "  slower"
+        print(line, flush=True)
+
+    if args.save:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Saved {len(results)} results to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} benchmark(s) more than {args.threshold}% slower than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+The benchmarks.
+
+Each case is a setup function that does all the preparation and returns the
+callable to time. Cases registered with `sized=True` are run once for each
+catalog size.
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import Callable
+
+import yaml
+from flask import Flask
+
+from benchmarks import catalog
+from dashboard import vanity
+from dashboard.jsonlog import JsonFormatter
+from dashboard.models.catalog import Catalog
+from dashboard.models.user import User
+from dashboard.oidc_auth import TokenVerification
+from dashboard.op.yaml_loader import vanity_urls
+
+TEST_DATA = Path(__file__).parent.parent / "tests" / "data"
+
+CASES: list[tuple[str, bool, Callable]] = []
+
+
+def case(name, sized=False):
+    def register(setup):
+        CASES.append((name, sized, setup))
+        return setup
+
+    return register
+
+
+@case("catalog.Catalog", sized=True)
+def build_catalog(size):
+    apps_yml = catalog.generate(size)
+    return lambda: Catalog(apps_yml)
+
+
+@case("catalog.Catalog.from_compiled", sized=True)
+def load_compiled_catalog(size):
+    compiled = Catalog(catalog.generate(size)).compile()
+    return lambda: Catalog.from_compiled(compiled)
+
+
+@case("catalog.Catalog.vanity_urls", sized=True)
+def catalog_vanity_urls(size):
+    apps = Catalog(catalog.generate(size))
+    return lambda: vanity_urls(apps.apps["apps"])
+
+
+@case("yaml.safe_load (pure Python)", sized=True)
+def pure_python_parse(size):
+    # Not something the dashboard runs: a reference point for catalog.Catalog,
+    # which parses with the libyaml bindings.
+    apps_yml = catalog.generate(size)
+    return lambda: yaml.load(apps_yml, Loader=yaml.SafeLoader)
+
+
+@case("user.User.app_ids", sized=True)
+def app_ids(size):
+    apps = Catalog(catalog.generate(size))
+    user = User(catalog.session_for(size), app_config=None)
+    return lambda: user.app_ids(apps)
+
+
+@case("user.User.apps", sized=True)
+def user_apps(size):
+    apps = Catalog(catalog.generate(size))
+    user = User(catalog.session_for(size), app_config=None)
+    return lambda: user.apps(apps)
+
+
+class _AppList:
+    def __init__(self, apps):
+        self.catalog = apps
+
+    def subscribe(self, callback):
+        pass
+
+
+@case("vanity.Router.redirect_url", sized=True)
+def redirect_url(size):
+    router = vanity.Router(Flask("dashboard"), _AppList(Catalog(catalog.generate(size))))
+    url = catalog.vanity_url(size).lstrip("/")
+    # make_response() needs an app context.
+    router.app.test_request_context().push()
+    return lambda: router.redirect_url(url)
+
+
+@case("oidc_auth.TokenVerification")
+def token_verification():
+    jws = (TEST_DATA / "mfa-required-jwt").read_bytes().strip()
+    public_key = (TEST_DATA / "public-signing-key.pem").read_bytes()
+    return lambda: TokenVerification(jws, public_key)
+
+
+@case("jsonlog.JsonFormatter.format")
+def json_format():
+    formatter = JsonFormatter()
+    record = logging.LogRecord("dashboard", logging.INFO, __file__, 1, 'User "%s" logged in', ("someone",), None)
+    return lambda: formatter.format(record)
+
+
+@case("jsonlog.JsonFormatter.format (exception)")
+def json_format_exception():
+    formatter = JsonFormatter()
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        exc_info = sys.exc_info()
+    record = logging.LogRecord("dashboard", logging.ERROR, __file__, 1, "Something broke", (), exc_info)
+
+    def format_record():
+        # Formatter caches the formatted traceback on the record.
+        record.exc_text = None
+        return formatter.format(record)
+
+    return format_record
@@ -0,0 +1,100 @@
+"""
+Generate apps.yml catalogs, and users to go with them.
+
+Sizes aside, the shape follows the real catalog: a few apps are open to
+everyone, most are restricted to one or a few groups, and the rest to a
+handful of named users. Group popularity is Zipf-like, so a few groups gate
+many apps while most gate one or two. Everything is drawn from a seeded
+`random.Random`, so the same arguments always give the same catalog.
+"""
+
+import random
+
+import yaml
+
+SIZES = (100, 1000, 10000)
+
+WORDS = (
+    "atlas bugzilla calendar dash explorer forge gateway hub insight jira kiln ledger monitor notebook "
+    "observatory portal quarry radar sentry tracker uplift vault wiki xray yard zephyr"
+).split()
+
+
+def _groups(n_apps):
+    count = max(10, n_apps // 4)
+    return [f"mozilliansorg_group-{i}" if i % 3 else f"team_{i}" for i in range(count)]
+
+
+def _zipf(count):
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def _email(i):
+    return f"user{i}@example.com"
+
+
+def generate_apps(n_apps, seed=0):
+    rng = random.Random(seed)
+    groups = _groups(n_apps)
+    weights = _zipf(len(groups))
+    n_users = max(50, n_apps * 2)
+    apps = []
+    for i in range(n_apps):
+        kind = rng.random()
+        authorized_groups, authorized_users = [], []
+        if kind < 0.15:
+            authorized_groups = ["everyone"]
+        elif kind < 0.85:
+            authorized_groups = sorted(set(rng.choices(groups, weights, k=rng.randint(1, 4))))
+            if rng.random() < 0.1:
+                authorized_users = [_email(rng.randrange(n_users)) for _ in range(rng.randint(1, 3))]
+        else:
+            authorized_users = [_email(rng.randrange(n_users)) for _ in range(rng.randint(1, 8))]
+        name = f"{rng.choice(WORDS).title()} {i}"
+        slug = name.lower().replace(" ", "-")
+        application = {
+            "name": name,
+            "op": "auth0",
+            "url": f"https://{slug}.example.com/login",
+            "logo": f"{slug}.png",
+            "display": rng.random() < 0.95,
+            "client_id": f"client-{i}",
+            "authorized_groups": authorized_groups,
+            "authorized_users": authorized_users,
+        }
+        if rng.random() < 0.2:
+            application["vanity_url"] = [f"/{slug}"]
+        if rng.random() < 0.3:
+            application["AAL"] = rng.choice(["LOW", "MEDIUM", "HIGH", "MAXIMUM"])
+        apps.append({"application": application})
+    return apps
+
+
+def generate(n_apps, seed=0):
+    """An apps.yml with `n_apps` apps."""
+    return yaml.safe_dump({"apps": generate_apps(n_apps, seed)}, sort_keys=True)
+
+
+def session_for(n_apps, seed=0):
+    """A session, like Flask-pyoidc stores, for a user of a catalog of `n_apps` apps."""
+    rng = random.Random(seed)
+    groups = _groups(n_apps)
+    member_of = sorted(set(rng.choices(groups, _zipf(len(groups)), k=20)))
+    email = _email(rng.randrange(max(50, n_apps * 2)))
+    sub = f"ad|Mozilla-LDAP|user{seed}"
+    return {
+        "id_token": {"sub": sub},
+        "userinfo": {
+            "sub": sub,
+            "email": email,
+            "https://sso.mozilla.com/claim/groups": member_of,
+        },
+    }
+
+
+def vanity_url(n_apps, seed=0):
+    """One of the vanity URLs in the generated catalog."""
+    for entry in generate_apps(n_apps, seed):
+        if "vanity_url" in entry["application"]:
+            return entry["application"]["vanity_url"][0]
+    raise ValueError("No vanity URLs in this catalog")
@@ -0,0 +1,152 @@
+"""
+CSS and JavaScript bundles.
+
+During development Flask-Assets builds the bundles on demand. For deployment
+they are built once, ahead of time, with
+
+    python -m dashboard.assets
+
+which writes minified copies named after a hash of their content into
+static/gen/, along with gzip (and, if the `brotli` package is installed,
+brotli) variants and a manifest.json. When the manifest is there, templates
+link to the hashed files. A hashed file never changes, so it can be cached
+for a year.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import Flask
+from flask import request
+from flask import send_from_directory
+from flask import url_for
+from flask_assets import Bundle  # type: ignore
+from flask_assets import Environment  # type: ignore
+
+from dashboard.sessions import sessionless
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger()
+
+MANIFEST = "manifest.json"
+# A year, the most any cache will honour.
+IMMUTABLE_MAX_AGE = 31536000
+# Best first, we serve the first one the client accepts.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+BUNDLES = ("css_all", "js_all")
+
+
+def register_bundles(environment: Environment) -> Environment:
+    js = Bundle("js/base.js", filters="jsmin", output="js/gen/packed.js")
+    environment.register("js_all", js)
+
+    sass = Bundle("css/base.scss", filters="scss")
+    css = Bundle(sass, filters="cssmin", output="css/gen/all.css")
+    environment.register("css_all", css)
+    return environment
+
+
+def hashed_name(filename: str, content: bytes) -> str:
+    """packed.js -> packed.<hash>.js"""
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return f"{stem}.{digest}{ext}"
+
+
+def _static_folder(app: Flask) -> str:
+    if app.static_folder is None:
+        raise RuntimeError("The app has no static folder to keep assets in")
+    return app.static_folder
+
+
+def build(app: Flask, names=None) -> dict:
+    """
+    Build the bundles (all of them, unless `names` is given) into static/gen/
+    and write the manifest mapping each bundle name to its hashed file.
+    """
+    environment = register_bundles(Environment(app))
+    static_dir = _static_folder(app)
+    gen_dir = os.path.join(static_dir, "gen")
+    os.makedirs(gen_dir, exist_ok=True)
+    manifest = {}
+    with app.app_context():
+        for name in names or BUNDLES:
+            bundle = environment[name]
+            bundle.build(force=True)
+            with open(os.path.join(static_dir, bundle.output), "rb") as f:
+                content = f.read()
+            filename = hashed_name(bundle.output, content)
+            _write(os.path.join(gen_dir, filename), content)
+            _write(os.path.join(gen_dir, filename + ".gz"), gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(os.path.join(gen_dir, filename + ".br"), brotli.compress(content))
+            manifest[name] = filename
+            logger.info(f"Built {name} as gen/{filename}")
+    _write(os.path.join(gen_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+def _write(path: str, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+class HashedAssets(object):
+    """Resolve bundle names to URLs, and serve the prebuilt files."""
+
+    def __init__(self, app: Flask, environment: Environment):
+        self.environment = environment
+        self.gen_dir = os.path.join(_static_folder(app), "gen")
+        self.manifest = self._load_manifest()
+        if self.manifest:
+            logger.info(f"Serving prebuilt assets for {', '.join(sorted(self.manifest))}")
+        app.add_template_global(self.urls, "asset_urls")
+        app.add_url_rule("/static/gen/<path:filename>", "hashed_asset", self.send)
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.gen_dir, MANIFEST), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def urls(self, name: str) -> list:
+        """
+        The URLs to load a bundle from. Without a manifest, fall back to
+        Flask-Assets, which builds the bundle if it needs to.
+        """
+        if name in self.manifest:
+            return [url_for("hashed_asset", filename=self.manifest[name])]
+        return self.environment[name].urls()
+
+    @sessionless
+    def send(self, filename):
+        # Based on the uncompressed name, otherwise a .gz would be sent as
+        # application/gzip.
+        mimetype = mimetypes.guess_type(filename)[0]
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding in request.accept_encodings and os.path.isfile(os.path.join(self.gen_dir, filename + suffix)):
+                response = send_from_directory(
+                    self.gen_dir, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE
+                )
+                response.content_encoding = encoding
+                break
+        else:
+            response = send_from_directory(self.gen_dir, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build(Flask("dashboard"))
@@ -0,0 +1,57 @@
+"""
+Compile apps.yml into the catalog artifact workers load at startup.
+
+The artifact is what `Catalog.compile()` writes, the same file workers keep
+next to apps.yml as data/apps.json: the entries that passed validation, the
+vanity URLs and the authorization index, all keyed by the version of the
+apps.yml it came from. Loading it is a JSON load, so building it ahead of
+time takes the YAML parse and the schema checks off the workers entirely.
+
+    sso-dashboard-compile-catalog apps.yml -o apps.json
+
+Run with `--strict` in CI to fail on any entry the dashboard would drop.
+"""
+
+import argparse
+import sys
+
+from dashboard.models.catalog import Catalog
+from dashboard.models.catalog import CatalogError
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="sso-dashboard-compile-catalog", description="Validate apps.yml and compile it into a catalog."
+    )
+    parser.add_argument("apps_yml", type=argparse.FileType("r"), help="apps.yml to compile, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="where to write the compiled catalog (default: stdout)")
+    parser.add_argument("--strict", action="store_true", help="fail if any app entry is invalid")
+    args = parser.parse_args(argv)
+
+    with args.apps_yml:
+        apps_yml = args.apps_yml.read()
+    try:
+        catalog = Catalog(apps_yml)
+    except CatalogError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+    print(
+        f"Compiled {len(catalog)} apps ({catalog.rejected} invalid, {len(catalog.vanity_urls)} vanity URLs) "
+        f"as version {catalog.version}",
+        file=sys.stderr,
+    )
+    if args.strict and catalog.rejected:
+        print(f"error: {catalog.rejected} invalid app entries", file=sys.stderr)
+        return 1
+
+    if args.output == "-":
+        sys.stdout.write(catalog.compile())
+    else:
+        with open(args.output, "w") as file:
+            file.write(catalog.compile())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
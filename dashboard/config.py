@@ -23,6 +23,16 @@ class Default:
         seconds=int(os.environ.get("PERMANENT_SESSION_LIFETIME", "86400"))
     )
 
+    # Store only the claims the dashboard uses (see dashboard/sessions.py),
+    # rather than everything Auth0 hands us.
+    SESSION_TRIM_CLAIMS: bool = os.environ.get("SESSION_TRIM_CLAIMS", "False") == "True"
+    SESSION_SERIALIZATION_FORMAT: str = os.environ.get("SESSION_SERIALIZATION_FORMAT", "msgpack")
+    # Sessions larger than this many bytes are logged and counted.
+    SESSION_SIZE_WARNING: int = int(os.environ.get("SESSION_SIZE_WARNING", "16384"))
+    # Unchanged sessions only have their TTL (and cookie expiry) pushed back
+    # at most once every this many seconds.
+    SESSION_TTL_REFRESH_INTERVAL: int = int(os.environ.get("SESSION_TTL_REFRESH_INTERVAL", "600"))
+
     SESSION_COOKIE_SAMESITE: str = os.environ.get("SESSION_COOKIE_SAMESITE", "lax")
     SESSION_COOKIE_HTTPONLY: bool = os.environ.get("SESSION_COOKIE_HTTPONLY", "True") == "True"
 
@@ -31,11 +41,62 @@ class Default:
     SESSION_COOKIE_NAME: str
     CDN: str
 
+    # How often, in seconds, each worker checks the CDN for a new apps.yml.
+    # A random jitter of up to CDN_REFRESH_JITTER seconds is added so that
+    # workers don't all hit the CDN at the same moment.
+    CDN_REFRESH_INTERVAL: float = float(os.environ.get("CDN_REFRESH_INTERVAL", "60"))
+    CDN_REFRESH_JITTER: float = float(os.environ.get("CDN_REFRESH_JITTER", "10"))
+
+    # Workers start from the last apps.yml they downloaded, or this one if
+    # there isn't one (e.g. a copy baked into the image), and check the CDN
+    # in the background. The catalog is reported as stale on /ready if the
+    # CDN hasn't been reached in the last CDN_STALE_AFTER seconds.
+    CDN_SEED_APPS_YML: str = os.environ.get("CDN_SEED_APPS_YML", "")
+    CDN_STALE_AFTER: float = float(os.environ.get("CDN_STALE_AFTER", "300"))
+    # Where the downloaded apps.yml, its ETag and the compiled catalog are
+    # kept. Empty means dashboard/data.
+    CDN_DATA_DIR: str = os.environ.get("CDN_DATA_DIR", "")
+    # The URL (or path) of a catalog compiled from apps.yml by
+    # sso-dashboard-compile-catalog, e.g. https://cdn.sso.mozilla.com/apps.json.
+    # When set, workers load it instead of parsing apps.yml, as long as it was
+    # compiled from the apps.yml they have.
+    CDN_COMPILED_CATALOG: str = os.environ.get("CDN_COMPILED_CATALOG", "")
+
+    # Timeouts (seconds) and retry policy for requests to the CDN.
+    CDN_CONNECT_TIMEOUT: float = float(os.environ.get("CDN_CONNECT_TIMEOUT", "3"))
+    CDN_READ_TIMEOUT: float = float(os.environ.get("CDN_READ_TIMEOUT", "10"))
+    CDN_RETRIES: int = int(os.environ.get("CDN_RETRIES", "2"))
+    CDN_RETRY_BACKOFF: float = float(os.environ.get("CDN_RETRY_BACKOFF", "0.5"))
+
+    # How long, in seconds, to cache the list of apps each user may see.
+    # Set to 0 to disable the cache.
+    TILE_CACHE_TTL: int = int(os.environ.get("TILE_CACHE_TTL", "300"))
+
     S3_BUCKET: str
     FORBIDDEN_PAGE_PUBLIC_KEY: bytes
+    # How many verified error tokens the forbidden page remembers.
+    FORBIDDEN_PAGE_CACHE_SIZE: int = int(os.environ.get("FORBIDDEN_PAGE_CACHE_SIZE", "1024"))
 
     PREFERRED_URL_SCHEME: str = os.environ.get("PREFERRED_URL_SCHEME", "https")
     REDIS_CONNECTOR: str
+    # The connection pool is shared by every greenlet in a worker. Once all
+    # REDIS_MAX_CONNECTIONS are in use, greenlets wait up to REDIS_POOL_TIMEOUT
+    # seconds for one to free up. Idle connections are PINGed before use if
+    # they haven't been used for REDIS_HEALTH_CHECK_INTERVAL seconds.
+    REDIS_MAX_CONNECTIONS: int = int(os.environ.get("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_POOL_TIMEOUT: float = float(os.environ.get("REDIS_POOL_TIMEOUT", "5"))
+    REDIS_SOCKET_TIMEOUT: float = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "5"))
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = float(os.environ.get("REDIS_SOCKET_CONNECT_TIMEOUT", "2"))
+    REDIS_HEALTH_CHECK_INTERVAL: int = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+    # Opt-in profiling of single requests, see dashboard/profiler.py. When
+    # disabled none of its hooks are registered. Tokens are valid for
+    # PROFILER_TOKEN_MAX_AGE seconds, and only the latest PROFILER_KEEP
+    # profiles are kept in PROFILER_DIR.
+    PROFILER_ENABLED: bool = os.environ.get("PROFILER_ENABLED", "False") == "True"
+    PROFILER_DIR: str = os.environ.get("PROFILER_DIR", "/tmp/sso-dashboard-profiles")
+    PROFILER_TOKEN_MAX_AGE: int = int(os.environ.get("PROFILER_TOKEN_MAX_AGE", "3600"))
+    PROFILER_KEEP: int = int(os.environ.get("PROFILER_KEEP", "50"))
 
     def __init__(self):
         self.SESSION_COOKIE_NAME = f"{self.SERVER_NAME}_session"
@@ -55,6 +116,14 @@ class OIDC:
     OIDC_REDIRECT_URI: str
     LOGIN_URL: str
 
+    # The provider's metadata and keys are shared by every worker through
+    # OIDC_CACHE_DIR, and fetched again once OIDC_CACHE_TTL seconds old. If
+    # discovery takes longer than OIDC_DISCOVERY_TIMEOUT seconds, the cached
+    # copy is used however old it is.
+    OIDC_CACHE_DIR: str = os.environ.get("OIDC_CACHE_DIR", "/tmp/sso-dashboard-oidc")
+    OIDC_CACHE_TTL: int = int(os.environ.get("OIDC_CACHE_TTL", "600"))
+    OIDC_DISCOVERY_TIMEOUT: float = float(os.environ.get("OIDC_DISCOVERY_TIMEOUT", "3"))
+
     def __init__(self):
         """General object initializer."""
         self.OIDC_DOMAIN = os.environ["OIDC_DOMAIN"]
@@ -0,0 +1,67 @@
+"""
+Gunicorn server hooks, loaded with `--config=python:dashboard.gunicorn_conf`.
+"""
+
+import gc
+import os
+
+from prometheus_client import multiprocess
+
+
+def clear_multiprocess_dir():
+    """
+    Start from an empty PROMETHEUS_MULTIPROC_DIR, otherwise whatever a
+    previous run left in there gets added to this run's metrics.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        os.remove(os.path.join(path, name))
+
+
+# Gunicorn loads this before it preloads the app, and nothing has recorded a
+# metric yet: the imports below are the first to, and the preload records
+# more. Clearing the directory any later would throw those away.
+clear_multiprocess_dir()
+
+from dashboard import worker as dashboard_worker  # noqa: E402
+from dashboard.instrumentation import serve_metrics  # noqa: E402
+
+# Build the app once, in the master, and fork the workers from it: they start
+# with the catalog parsed and the templates compiled, and share that memory
+# copy-on-write. See dashboard.worker for what each worker builds for itself.
+preload_app = True
+
+
+def when_ready(server):
+    """
+    Runs in the master once the app is loaded, before any worker is forked.
+    """
+    # Objects the collector never looks at are never written to, so the
+    # pages holding them stay shared between the workers.
+    gc.freeze()
+    # The master doesn't serve, so its gauges (e.g. the size of the catalog
+    # it preloaded) shouldn't be mistaken for a live worker's.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+    # Every worker's metrics, served by the master on an address of its own
+    # so they aren't public. Set METRICS_PORT to nothing to turn this off.
+    port = os.environ.get("METRICS_PORT", "9000")
+    if port:
+        serve_metrics(int(port), os.environ.get("METRICS_ADDR", "127.0.0.1"))
+
+
+def post_worker_init(worker):
+    """
+    Open the worker's connections and start its refresher. This runs after
+    the gevent worker has monkey-patched itself, which post_fork doesn't.
+    """
+    dashboard_worker.start(worker.wsgi)
+
+
+def child_exit(server, worker):
+    """Stop reporting the live gauges of a worker that has gone away."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
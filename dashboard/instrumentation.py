@@ -0,0 +1,70 @@
+"""
+Record request and template timings, and serve the metrics.
+
+The metrics are served on a listener of their own (see `serve_metrics` and
+gunicorn_conf), bound to localhost by default, rather than as a route of
+the public app.
+"""
+
+import os
+import time
+
+from flask import Flask
+from flask import g
+from flask import request
+from flask import before_render_template
+from flask import template_rendered
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import multiprocess
+from prometheus_client import start_http_server
+
+from dashboard.metrics import REQUEST_SECONDS
+from dashboard.metrics import REQUESTS
+from dashboard.metrics import TEMPLATE_RENDER_SECONDS
+
+
+def registry() -> CollectorRegistry:
+    """The registry to report from: every worker's, if there is more than one."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    collector = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector)
+    return collector
+
+
+def serve_metrics(port: int, addr: str = "127.0.0.1"):
+    """Serve the metrics at http://<addr>:<port>/metrics, from a thread of this process."""
+    start_http_server(port, addr, registry=registry())
+
+
+def instrument(app: Flask):
+    """Time every request and template."""
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            # The endpoint, rather than the path, keeps the number of label
+            # values bounded; anything that didn't match a route is "none".
+            endpoint = request.endpoint or "none"
+            REQUEST_SECONDS.labels(request.method, endpoint).observe(time.perf_counter() - start)
+            REQUESTS.labels(request.method, endpoint, str(response.status_code)).inc()
+        return response
+
+    def start_render(sender, template, context, **extra):
+        g.setdefault("render_starts", []).append(time.perf_counter())
+
+    def record_render(sender, template, context, **extra):
+        starts = g.get("render_starts")
+        if starts:
+            TEMPLATE_RENDER_SECONDS.labels(template.name or "<string>").observe(time.perf_counter() - starts.pop())
+
+    # Signals only hold weak references by default, which would let these
+    # be garbage collected as soon as we return.
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(record_render, app, weak=False)
@@ -0,0 +1,87 @@
+"""
+Prometheus metrics for the dashboard.
+
+Under gunicorn each worker is its own process. Set PROMETHEUS_MULTIPROC_DIR
+(to an empty directory, before anything is imported) and the workers write
+their metrics there, so /metrics reports on all of them no matter which
+worker answers. See dashboard/gunicorn_conf.py for the cleanup that needs.
+"""
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+# Most of what we serve should take milliseconds, the tail is for the
+# requests that wait on Redis or the IdP.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_SECONDS = Histogram(
+    "dashboard_request_seconds",
+    "Time taken to handle a request, by endpoint.",
+    ["method", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "dashboard_requests_total",
+    "Requests handled, by endpoint and status code.",
+    ["method", "endpoint", "status"],
+)
+TEMPLATE_RENDER_SECONDS = Histogram(
+    "dashboard_template_render_seconds",
+    "Time taken to render a template.",
+    ["template"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CDN_SYNC_SECONDS = Histogram(
+    "dashboard_cdn_sync_seconds",
+    "Time taken to check the CDN for, and download, a new apps.yml.",
+    buckets=LATENCY_BUCKETS,
+)
+CDN_SYNCS = Counter(
+    "dashboard_cdn_syncs_total",
+    "Checks of the CDN for a new apps.yml, by outcome (updated, not_modified or error).",
+    ["outcome"],
+)
+CATALOG_PARSE_SECONDS = Histogram(
+    "dashboard_catalog_parse_seconds",
+    "Time taken to parse, validate and index apps.yml.",
+    buckets=LATENCY_BUCKETS,
+)
+CATALOG_APPS = Gauge(
+    "dashboard_catalog_apps",
+    "Apps in the catalog currently being served.",
+    multiprocess_mode="livemax",
+)
+AUTHORIZATION_SECONDS = Histogram(
+    "dashboard_authorization_seconds",
+    "Time taken to work out which apps a user may see.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+
+SESSION_SIZE = Histogram(
+    "dashboard_session_bytes",
+    "Size of serialized sessions written to Redis.",
+    buckets=(512, 1024, 2048, 4096, 8192, 16384, 32768, 65536),
+)
+SESSION_OVERSIZED = Counter(
+    "dashboard_session_oversized_total",
+    "Sessions written to Redis that were larger than SESSION_SIZE_WARNING.",
+)
+
+REDIS_COMMAND_SECONDS = Histogram(
+    "dashboard_redis_command_seconds",
+    "Time taken by Redis commands, including waiting for a connection.",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+REDIS_COMMAND_ERRORS = Counter(
+    "dashboard_redis_command_errors_total",
+    "Redis commands that raised an error.",
+    ["command"],
+)
+REDIS_POOL_WAIT_SECONDS = Histogram(
+    "dashboard_redis_pool_wait_seconds",
+    "Time spent waiting for a connection from the Redis pool.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
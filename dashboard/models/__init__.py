@@ -1 +1 @@
-__all__ = ["tile", "user", "apps"]
+__all__ = ["tile", "user", "apps", "catalog"]
@@ -0,0 +1,161 @@
+"""An in-memory snapshot of the apps.yml catalog."""
+
+import hashlib
+import json
+import logging
+from typing import Optional
+
+import yaml
+
+from dashboard.models.apps import AppEntry
+from dashboard.models.validator import compile_validator
+from dashboard.op.yaml_loader import SafeLoader
+from dashboard.op.yaml_loader import vanity_urls
+
+logger = logging.getLogger()
+
+is_valid_entry = compile_validator(AppEntry)
+
+# Bump when what `Catalog.compile()` writes changes shape.
+COMPILED_FORMAT = 2
+
+
+def source_version(apps_yml: str) -> str:
+    """The version of the catalog built from this apps.yml."""
+    return hashlib.sha256(apps_yml.encode("utf-8")).hexdigest()[:16]
+
+
+class CatalogError(Exception):
+    pass
+
+
+class Catalog:
+    """
+    A parsed, validated and alphabetized view of apps.yml.
+
+    One of these is built each time the ETag of apps.yml changes, and the
+    same instance is then handed to every request. Nothing on the request
+    path should have to parse YAML or type-check entries again, so treat
+    it as read-only.
+    """
+
+    def __init__(self, apps_yml: str, etag: Optional[str] = None):
+        self.etag = etag
+        try:
+            # Identifies this exact catalog. Unlike the ETag it can't be stale
+            # or missing, so it is safe to build cache keys from.
+            self.version = source_version(apps_yml)
+            entries = yaml.load(apps_yml, Loader=SafeLoader)["apps"]
+        except yaml.YAMLError as exc:
+            raise CatalogError("apps.yml is not valid YAML") from exc
+        except (TypeError, KeyError) as exc:
+            raise CatalogError("apps.yml does not contain a list of apps") from exc
+        if not isinstance(entries, list):
+            raise CatalogError("apps.yml does not contain a list of apps")
+        # Validate before sorting, sorting needs every entry to have a name.
+        valid = [entry for entry in map(self._normalize, entries) if self._is_valid(entry)]
+        valid.sort(key=lambda entry: entry["application"]["name"].lower())
+        self.rejected = len(entries) - len(valid)
+        self.apps = {"apps": valid}
+        self.vanity_urls = vanity_urls(valid)
+        self._build_index()
+
+    @classmethod
+    def from_compiled(cls, compiled: str, etag: Optional[str] = None) -> "Catalog":
+        """
+        Load a catalog written by `compile()`. All the work was done before
+        it was written, so this is only a JSON load.
+        """
+        try:
+            data = json.loads(compiled)
+            if data["format"] != COMPILED_FORMAT:
+                raise CatalogError(f"Unsupported compiled catalog format {data["format"]!r}")
+            catalog = cls.__new__(cls)
+            catalog.etag = etag
+            catalog.version = data["version"]
+            catalog.rejected = data["rejected"]
+            catalog.apps = {"apps": data["apps"]}
+            catalog.vanity_urls = data["vanity_urls"]
+            catalog.everyone = data["index"]["everyone"]
+            catalog.by_group = data["index"]["by_group"]
+            catalog.by_user = data["index"]["by_user"]
+        except (ValueError, TypeError, KeyError) as exc:
+            raise CatalogError("Not a compiled catalog") from exc
+        return catalog
+
+    def compile(self) -> str:
+        """Serialize the catalog, index and all, for `from_compiled()` to load."""
+        return json.dumps(
+            {
+                "format": COMPILED_FORMAT,
+                "version": self.version,
+                "rejected": self.rejected,
+                "apps": self.apps["apps"],
+                "vanity_urls": self.vanity_urls,
+                "index": {"everyone": self.everyone, "by_group": self.by_group, "by_user": self.by_user},
+            }
+        )
+
+    def __len__(self):
+        return len(self.apps["apps"])
+
+    def _build_index(self):
+        """
+        Invert the authorized_groups/authorized_users lists so we can find a
+        user's apps with a handful of lookups, rather than walking the whole
+        catalog. Entries are referred to by their position in `self.apps`,
+        which keeps the results in alphabetical order.
+        """
+        self.everyone: list[int] = []
+        self.by_group: dict[str, list[int]] = {}
+        self.by_user: dict[str, list[int]] = {}
+        for app_id, entry in enumerate(self.apps["apps"]):
+            app = entry["application"]
+            if not app["display"]:
+                continue
+            if "everyone" in app["authorized_groups"]:
+                self.everyone.append(app_id)
+                continue
+            for group in set(app["authorized_groups"]):
+                self.by_group.setdefault(group, []).append(app_id)
+            for user in set(app["authorized_users"]):
+                self.by_user.setdefault(user, []).append(app_id)
+
+    def authorized_ids(self, groups, identifiers) -> list[int]:
+        """Return the ids of the apps visible to someone with these groups and identifiers."""
+        app_ids = set(self.everyone)
+        for group in groups:
+            app_ids.update(self.by_group.get(group, ()))
+        for identifier in identifiers:
+            app_ids.update(self.by_user.get(identifier, ()))
+        return sorted(app_ids)
+
+    def entries(self, app_ids) -> list:
+        """Return the app entries for a list of ids."""
+        return [self.apps["apps"][app_id] for app_id in app_ids]
+
+    @staticmethod
+    def _normalize(entry):
+        """
+        Some entries quote display, e.g. `display: "False"`. The dashboard has
+        always hidden those, so turn the string into the bool it stands for
+        rather than rejecting the entry.
+        """
+        try:
+            display = entry["application"]["display"]
+        except (TypeError, KeyError):
+            return entry
+        if isinstance(display, str):
+            entry["application"]["display"] = display.strip().lower() not in ("", "false")
+        return entry
+
+    @staticmethod
+    def _is_valid(entry) -> bool:
+        """If an app doesn't have the required fields skip it."""
+        if is_valid_entry(entry):
+            return True
+        try:
+            logger.warning(f"invalid YAML for app {entry["application"].get("name", "unknown")} detected")
+        except (AttributeError, TypeError, KeyError):
+            logger.warning("invalid YAML for app detected")
+        return False
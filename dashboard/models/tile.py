@@ -1,10 +1,24 @@
 """Governs loading all tile displayed to the user in the Dashboard."""
 
+import hashlib
+import json
 import logging
 import os
+import random
+import threading
+import time
+import redis
 import urllib3
 from urllib3.exceptions import HTTPError
 
+from dashboard.metrics import CATALOG_APPS
+from dashboard.metrics import CATALOG_PARSE_SECONDS
+from dashboard.metrics import CDN_SYNCS
+from dashboard.metrics import CDN_SYNC_SECONDS
+from dashboard.models.catalog import Catalog
+from dashboard.models.catalog import CatalogError
+from dashboard.models.catalog import source_version
+
 logger = logging.getLogger()
 
 
@@ -14,40 +28,71 @@ class CDNTransfer(object):
     def __init__(self, app_config):
         """
         Handles fetching and loading the apps.yml file
-        When a CDNTransfer Object is instantiated, the CDN is checked for
-        an updated version of apps.yml.  If a ETags are mismatched then
-        a new version is available. We download it which causes the worker
-        to reload.  If the Etags of the CDN matches that on disk, we
-        simply read from the disk.
+        When a CDNTransfer Object is instantiated, it starts from the last
+        apps.yml it downloaded (or, failing that, CDN_SEED_APPS_YML) rather
+        than waiting on the CDN, which is left to the refresher. Only when
+        there is no copy at all is the CDN checked there and then. If a
+        ETags are mismatched then a new version is available. We download
+        it and swap a freshly parsed catalog in place of the old one,
+        without restarting the worker.
         """
         self.app_config = app_config
         self.apps_yml = None
+        self.catalog = None
+        self._subscribers = []
         self.url = self.app_config.CDN + "/apps.yml"
-        # Check if there is an update to apps.yml
-        self.sync_config()
-
-    def is_updated(self):
-        """Compare etag of what is in CDN to what is on disk."""
-        http = urllib3.PoolManager()
-        response = http.request("HEAD", self.url)
-
-        if response.headers["ETag"] != self._etag():
-            logger.warning("Etags do not match")
-            return True
-        else:
-            return False
+        self._refresher = None
+        self._stop_refresher = threading.Event()
+        # When we last heard from the CDN, see `fresh`.
+        self.checked_at = None
+        self.http = self._pool_manager()
+        self._load_local_catalog()
+        if self.catalog is None:
+            # Nothing to serve until we have heard from the CDN.
+            self.sync_config()
+
+    def _pool_manager(self):
+        # One pool per process, shared by every sync. Without timeouts a hung
+        # CDN would pin whichever worker is waiting on it.
+        return urllib3.PoolManager(
+            timeout=urllib3.Timeout(
+                connect=self.app_config.CDN_CONNECT_TIMEOUT,
+                read=self.app_config.CDN_READ_TIMEOUT,
+            ),
+            retries=urllib3.Retry(
+                total=self.app_config.CDN_RETRIES,
+                backoff_factor=self.app_config.CDN_RETRY_BACKOFF,
+                status_forcelist=(500, 502, 503, 504),
+            ),
+        )
+
+    def connect(self):
+        """
+        Give this process its own HTTP pool.
+
+        A worker forked from a process that already synced would otherwise
+        share that process's connections to the CDN. The catalog itself is
+        inherited as is, so report it from here too.
+        """
+        self.http = self._pool_manager()
+        if self.catalog is not None:
+            CATALOG_APPS.set(len(self.catalog))
+
+    def _path(self, name):
+        """Where we keep apps.yml, its ETag and the compiled catalog: CDN_DATA_DIR, or dashboard/data."""
+        data_dir = self.app_config.CDN_DATA_DIR or os.path.join(os.path.dirname(__file__), "../data")
+        return os.path.join(data_dir, name)
 
     def _update_etag(self, etag):
         """Update the etag file."""
-        this_dir = os.path.dirname(__file__)
-        filename = os.path.join(this_dir, "../data/{name}").format(name="apps.yml-etag")
-        with open(filename, "w+") as c:
+        filename = self._path("apps.yml-etag")
+        with open(f"{filename}.{os.getpid()}.tmp", "w") as c:
             c.write(etag)
+        os.replace(f"{filename}.{os.getpid()}.tmp", filename)
 
     def _etag(self):
         """get the etag from the file"""
-        this_dir = os.path.dirname(__file__)
-        filename = os.path.join(this_dir, "../data/{name}").format(name="apps.yml-etag")
+        filename = self._path("apps.yml-etag")
         try:
             with open(filename, "r") as f:
                 # What happens if we read nothing?
@@ -63,62 +108,299 @@ class CDNTransfer(object):
             return "12345678"
 
     def _download_config(self):
-        """Download the apps.yml from the CDN."""
-        http = urllib3.PoolManager()
+        """
+        Download the apps.yml from the CDN, if it differs from what is on disk.
 
+        This is a conditional GET: the CDN answers 304 Not Modified when the
+        ETag on disk is still current, which saves us a separate HEAD request.
+        Returns True if a new apps.yml was written.
+        """
         try:
-            logger.info("Downloading apps.yml from CDN")
-            response = http.request("GET", self.url)
+            response = self.http.request("GET", self.url, headers={"If-None-Match": self._etag()})
+            if response.status == 304:
+                return False
             if response.status != 200:
                 raise HTTPError(f"HTTP request failed with status {response.status}")
         except HTTPError as exc:
             exc.add_note("Request for apps.yml failed")
             raise
 
-        this_dir = os.path.dirname(__file__)
-        filename = os.path.join(this_dir, "../data/{name}").format(name="apps.yml")
+        logger.info("Downloaded apps.yml from CDN")
+
+        filename = self._path("apps.yml")
 
         try:
-            # As soon as this file is closed, gunicorn should reload the workers
-            with open(filename, "wb") as file:
+            # Keep a copy on disk, that's what a new worker starts from. Other
+            # workers may be reading it, so write it to the side and swap it in
+            # whole, and only then record its ETag.
+            with open(f"{filename}.{os.getpid()}.tmp", "wb") as file:
                 file.write(response.data)
                 # Ensure all data is flushed to disk
                 file.flush()
                 # Ensure data is written to disk before proceeding
                 os.fsync(file.fileno())
-                # It is very important that the ETag file is written before we close
-                # apps.yml file. Otherwise, this may cause a reload loop
-                self._update_etag(response.headers["ETag"])
+            os.replace(f"{filename}.{os.getpid()}.tmp", filename)
+            self._update_etag(response.headers["ETag"])
         except Exception as exc:
             exc.add_note("An error occurred while attempting to write apps.yml")
             raise
+        self.apps_yml = response.data.decode("utf-8")
+        return True
 
     def _load_apps_yml(self):
         """Load the apps.yml file on disk"""
-        this_dir = os.path.dirname(__file__)
-        filename = os.path.join(this_dir, "../data/{name}").format(name="apps.yml")
+        filename = self._path("apps.yml")
         with open(filename, "r") as file:
             logger.info("Loading apps.yml from disk")
             self.apps_yml = file.read()
 
+    def _load_local_catalog(self):
+        """Load the last apps.yml we downloaded, or the seed catalog if there isn't one."""
+        try:
+            self._load_apps_yml()
+        except OSError:
+            logger.info("No apps.yml on disk")
+        seed = self.app_config.CDN_SEED_APPS_YML
+        if not self.apps_yml and seed:
+            try:
+                with open(seed, "r") as file:
+                    logger.info(f"Loading the seed catalog from {seed}")
+                    self.apps_yml = file.read()
+            except OSError:
+                logger.exception("Problem loading the seed catalog")
+        if not self.apps_yml:
+            return
+        try:
+            self._load_catalog()
+        except Exception:
+            logger.exception("Problem parsing the config file")
+
+    @property
+    def fresh(self):
+        """Whether the catalog was checked against the CDN in the last CDN_STALE_AFTER seconds."""
+        if self.checked_at is None:
+            return False
+        return time.monotonic() - self.checked_at < self.app_config.CDN_STALE_AFTER
+
+    def subscribe(self, callback):
+        """Call `callback(catalog)` every time a new catalog is swapped in."""
+        self._subscribers.append(callback)
+
+    def _load_catalog(self):
+        """
+        Parse apps.yml into a catalog snapshot, unless we already have one for
+        this ETag.
+
+        The new catalog is built off to the side and then swapped in with a
+        single assignment, so requests see either the old snapshot or the new
+        one, never something in between. If it fails to parse, we carry on
+        serving the old one.
+        """
+        etag = self._etag()
+        if self.catalog is not None and self.catalog.etag == etag:
+            return
+        with CATALOG_PARSE_SECONDS.time():
+            catalog = self._load_compiled_catalog(etag)
+            if catalog is None:
+                catalog = self._fetch_compiled_catalog(etag)
+                if catalog is None:
+                    catalog = Catalog(self.apps_yml, etag=etag)
+                self._write_compiled_catalog(catalog)
+        self.catalog = catalog
+        CATALOG_APPS.set(len(catalog))
+        logger.info(f"Loaded catalog of {len(catalog)} apps")
+        for callback in self._subscribers:
+            try:
+                callback(catalog)
+            except Exception:
+                logger.exception("Problem applying the new catalog")
+
+    def _load_compiled_catalog(self, etag):
+        """
+        Load the compiled copy of apps.yml that we, or another worker, left
+        on disk, if it was compiled from this apps.yml. That's a JSON load
+        rather than a YAML parse plus validating every entry.
+        """
+        filename = self._path("apps.json")
+        try:
+            with open(filename, "r") as file:
+                catalog = Catalog.from_compiled(file.read(), etag=etag)
+        except FileNotFoundError:
+            return None
+        except CatalogError:
+            logger.exception("Ignoring the compiled catalog")
+            return None
+        if catalog.version != source_version(self.apps_yml):
+            return None
+        logger.info("Loaded the compiled catalog from disk")
+        return catalog
+
+    def _fetch_compiled_catalog(self, etag):
+        """
+        Load the compiled catalog the configuration pipeline publishes next to
+        apps.yml (see dashboard.compile_catalog), from the URL or path in
+        CDN_COMPILED_CATALOG. It is only used if it was compiled from this
+        apps.yml, otherwise we compile apps.yml ourselves.
+        """
+        location = self.app_config.CDN_COMPILED_CATALOG
+        if not location:
+            return None
+        try:
+            if location.startswith(("http://", "https://")):
+                response = self.http.request("GET", location)
+                if response.status != 200:
+                    raise HTTPError(f"HTTP request failed with status {response.status}")
+                compiled = response.data.decode("utf-8")
+            else:
+                with open(location, "r") as file:
+                    compiled = file.read()
+            catalog = Catalog.from_compiled(compiled, etag=etag)
+        except (HTTPError, OSError, UnicodeDecodeError, CatalogError):
+            logger.exception(f"Problem loading the compiled catalog from {location}")
+            return None
+        if catalog.version != source_version(self.apps_yml):
+            logger.warning(f"The compiled catalog at {location} is not for this apps.yml, ignoring it")
+            return None
+        logger.info(f"Loaded the compiled catalog from {location}")
+        return catalog
+
+    def _write_compiled_catalog(self, catalog):
+        filename = self._path("apps.json")
+        try:
+            # Other workers may be reading it, so swap the new one in whole.
+            with open(f"{filename}.{os.getpid()}.tmp", "w") as file:
+                file.write(catalog.compile())
+            os.replace(f"{filename}.{os.getpid()}.tmp", filename)
+        except OSError:
+            logger.exception("Problem writing the compiled catalog")
+
     def sync_config(self):
         """Determines if the config file is updated and if so fetches the new config."""
+        start = time.perf_counter()
         try:
-            # Check if the CDN has an updated apps.yml
-            if self.is_updated():
-                logger.info("Config file is updated fetching new config.")
-                self._download_config()
+            # Fetch apps.yml from the CDN if it has been updated
+            if self._download_config():
+                logger.info("Config file is updated, fetched new config.")
+                outcome = "updated"
+            else:
+                outcome = "not_modified"
+            self.checked_at = time.monotonic()
         except Exception:
             logger.exception("Problem fetching config file")
+            outcome = "error"
+        CDN_SYNC_SECONDS.observe(time.perf_counter() - start)
+        CDN_SYNCS.labels(outcome).inc()
 
-        # Load the apps.yml file into self.apps_list
-        # if it isn't already loaded
+        # Load the apps.yml file into self.apps_list if it isn't already
+        # loaded, or if another worker has since downloaded a newer one: the
+        # CDN then answers 304, as the ETag on disk is already current.
         try:
             if not self.apps_yml:
                 self._load_apps_yml()
+            elif outcome == "not_modified" and self.catalog is not None and self.catalog.etag != self._etag():
+                self._load_apps_yml()
         except Exception:
             logger.exception("Problem loading the config file")
 
+        # Parse it once, every request then shares the same snapshot.
+        try:
+            self._load_catalog()
+        except Exception:
+            logger.exception("Problem parsing the config file")
+
+    def start_refresher(self):
+        """
+        Keep the catalog current from the background, so that requests only
+        ever read the current snapshot and never wait on the CDN.
+
+        Under gunicorn's gevent worker `threading` is monkey-patched, so this
+        ends up being a greenlet rather than an OS thread.
+        """
+        if self._refresher is not None:
+            return
+        # A new event rather than clearing the old one, which may have been
+        # made before gevent patched this process.
+        self._stop_refresher = threading.Event()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="cdn-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        """Stop the background refresher, if it is running."""
+        self._stop_refresher.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh_loop(self):
+        interval = self.app_config.CDN_REFRESH_INTERVAL
+        jitter = self.app_config.CDN_REFRESH_JITTER
+        # We may have started from a copy on disk without asking the CDN.
+        if not self.fresh:
+            self.sync_config()
+        while not self._stop_refresher.wait(interval + random.uniform(0, jitter)):
+            self.sync_config()
+
+
+class TileCache(object):
+    """Cache the ids of the apps each user may see, in Redis."""
+
+    def __init__(self, client, ttl):
+        """
+        :param client: redis.Redis client, the one sessions are stored with.
+        :param ttl: How long, in seconds, to keep an entry. 0 disables the cache.
+        """
+        self.client = client
+        self.ttl = ttl
+
+    @staticmethod
+    def fingerprint(user):
+        """Hash everything that decides which apps a user sees."""
+        groups = sorted(set(user.group_membership()))
+        identifiers = sorted(set(identifier for identifier in user.user_identifiers() if identifier))
+        return hashlib.sha256(json.dumps([groups, identifiers]).encode("utf-8")).hexdigest()
+
+    def key(self, user, catalog):
+        """
+        Keys include the catalog version, so a new catalog implicitly
+        invalidates every entry; the old ones are left to expire.
+        """
+        return f"sso-dashboard:tiles:{catalog.version}:{self.fingerprint(user)}"
+
+    def apps(self, user, catalog):
+        """Return the apps the user may see, from the cache if we can."""
+        if self.ttl <= 0:
+            return user.apps(catalog)
+        key = self.key(user, catalog)
+        try:
+            cached = self.client.get(key)
+        except redis.RedisError:
+            logger.exception("Problem reading the tile cache")
+            return user.apps(catalog)
+        if cached is not None:
+            return catalog.entries(json.loads(cached))
+        app_ids = user.app_ids(catalog)
+        try:
+            self.client.set(key, json.dumps(app_ids), ex=self.ttl)
+        except redis.RedisError:
+            logger.exception("Problem writing the tile cache")
+        return catalog.entries(app_ids)
+
+
+def tiles(apps, cdn):
+    """
+    What the dashboard needs to draw each tile. App entries also list
+    who is authorized to use them, which the browser has no business
+    seeing.
+    """
+    return [
+        {
+            "name": entry["application"]["name"],
+            "url": entry["application"]["url"],
+            "logo": f"{cdn}/images/{entry["application"]["logo"]}",
+        }
+        for entry in apps
+    ]
+
 
 class Tile(object):
     def __init__(self, app_config):
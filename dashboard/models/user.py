@@ -3,9 +3,8 @@
 import logging
 import time
 from faker import Faker
-from typeguard import check_type, TypeCheckError
 
-from dashboard.models.apps import Application
+from dashboard.metrics import AUTHORIZATION_SECONDS
 
 fake = Faker()
 logger = logging.getLogger()
@@ -26,20 +25,14 @@ class User(object):
             email = self.userinfo.get("https://sso.mozilla.com/claim/emails")[0]["emails"]
         return email
 
-    def apps(self, app_list):
+    def apps(self, catalog):
         """Return a list of the apps a user is allowed to see in dashboard."""
-        authorized_apps = []
-        for app in app_list["apps"]:
-            if not self._is_valid_yaml(app):
-                try:
-                    logger.warning(f"invalid YAML for app {app.get("name", "unknown")} detected")
-                except AttributeError:
-                    logger.warning(f"invalid YAML for app detected")
-                continue
-            if not self._is_authorized(app):
-                continue
-            authorized_apps.append(app)
-        return authorized_apps
+        return catalog.entries(self.app_ids(catalog))
+
+    @AUTHORIZATION_SECONDS.time()
+    def app_ids(self, catalog):
+        """Return the catalog ids of the apps a user is allowed to see in dashboard."""
+        return catalog.authorized_ids(self.group_membership(), self.user_identifiers())
 
     @property
     def avatar(self):
@@ -78,28 +71,6 @@ class User(object):
         """Construct a list of potential user identifiers to match on."""
         return [self.email(), self.userinfo["sub"]]
 
-    def _is_authorized(self, app):
-        if app["application"]["display"] == "False":
-            return False
-        elif not app["application"]["display"]:
-            return False
-        elif "everyone" in app["application"]["authorized_groups"]:
-            return True
-        elif set(app["application"]["authorized_groups"]) & set(self.group_membership()):
-            return True
-        elif set(app["application"]["authorized_users"]) & set(self.user_identifiers()):
-            return True
-        else:
-            return False
-
-    def _is_valid_yaml(self, app):
-        """If an app doesn't have the required fields skip it."""
-        try:
-            check_type(app["application"], Application)
-            return True
-        except TypeCheckError:
-            return False
-
 
 class FakeUser(object):
     def __init__(self, app_config):
@@ -109,15 +80,8 @@ class FakeUser(object):
     def email(self):
         return fake.email()
 
-    def apps(self, app_list):
-        authorized_apps = []
-        for app in app_list["apps"]:
-            if not self._is_valid_yaml(app):
-                continue
-            if not self._is_authorized(app):
-                continue
-            authorized_apps.append(app)
-        return authorized_apps
+    def apps(self, catalog):
+        return catalog.entries(catalog.authorized_ids(self.group_membership(), []))
 
     @property
     def avatar(self):
@@ -133,12 +97,3 @@ class FakeUser(object):
     @property
     def last_name(self):
         return fake.last_name()
-
-    def _is_valid_yaml(self, app):
-        return True
-
-    def _is_authorized(self, app):
-        if "everyone" in app["application"]["authorized_groups"]:
-            return True
-        else:
-            return False
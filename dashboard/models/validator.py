@@ -0,0 +1,53 @@
+"""
+Compile the TypedDicts in `dashboard.models.apps` into plain validation
+functions.
+
+Reflecting over the type hints (which is what typeguard does) happens once,
+when the validator is compiled; checking an entry afterwards is just a few
+`isinstance` calls. Only the typing constructs our schema actually uses are
+supported.
+"""
+
+from typing import Any, Callable, Literal, get_args, get_origin, get_type_hints, is_typeddict
+
+Validator = Callable[[Any], bool]
+
+
+def compile_validator(schema) -> Validator:
+    """Return a function that checks if a value matches `schema`."""
+    if is_typeddict(schema):
+        return _compile_typeddict(schema)
+    origin = get_origin(schema)
+    if origin is Literal:
+        allowed = get_args(schema)
+        return lambda value: any(value == option and type(value) is type(option) for option in allowed)
+    if origin is list:
+        (item_schema,) = get_args(schema)
+        validate_item = compile_validator(item_schema)
+        return lambda value: isinstance(value, list) and all(validate_item(item) for item in value)
+    if schema in (str, bool, int, float):
+        return lambda value: isinstance(value, schema)
+    raise TypeError(f"Cannot compile a validator for {schema!r}")
+
+
+def _compile_typeddict(schema) -> Validator:
+    # get_type_hints strips NotRequired[] for us, which keys are required is
+    # recorded separately on the TypedDict.
+    fields = [
+        (key, key in schema.__required_keys__, compile_validator(hint)) for key, hint in get_type_hints(schema).items()
+    ]
+    known_keys = frozenset(key for key, _, _ in fields)
+
+    def validate(value) -> bool:
+        if not isinstance(value, dict) or not known_keys.issuperset(value):
+            return False
+        for key, required, validate_field in fields:
+            if key not in value:
+                if required:
+                    return False
+                continue
+            if not validate_field(value[key]):
+                return False
+        return True
+
+    return validate
@@ -1,6 +1,10 @@
+import functools
+import hashlib
 import json
+import threading
 from typing import Optional
 import josepy.errors
+from cachetools import LRUCache
 from josepy.jwk import JWK
 from josepy.jws import JWS
 
@@ -9,6 +13,10 @@ from flask_pyoidc import OIDCAuthentication  # type: ignore
 from flask_pyoidc.provider_configuration import ClientMetadata  # type: ignore
 from flask_pyoidc.provider_configuration import ProviderConfiguration  # type: ignore
 
+from dashboard.oidc_cache import DiskCache
+from dashboard.oidc_cache import discover
+from dashboard.oidc_cache import share_keys
+
 KNOWN_ERROR_CODES = {
     "githubrequiremfa",
     "fxarequiremfa",
@@ -28,6 +36,7 @@ class OpenIDConnect:
     def __init__(self, configuration):
         """Object initializer for auth object."""
         self.oidc_config = configuration
+        self.cache = DiskCache(configuration.OIDC_CACHE_DIR, configuration.OIDC_CACHE_TTL)
 
     def client_info(self):
         client_info = ClientMetadata(client_id=self.oidc_config.client_id, client_secret=self.oidc_config.client_secret)
@@ -35,8 +44,12 @@ class OpenIDConnect:
 
     def provider_info(self):
         auth_request_params = {"scope": ["openid", "profile", "email"]}
+        # Passing the metadata in saves flask_pyoidc discovering the provider itself.
+        provider_metadata = discover(
+            f"https://{self.oidc_config.OIDC_DOMAIN}", self.cache, self.oidc_config.OIDC_DISCOVERY_TIMEOUT
+        )
         provider_config = ProviderConfiguration(
-            issuer=f"https://{self.oidc_config.OIDC_DOMAIN}",
+            provider_metadata=provider_metadata,
             client_metadata=self.client_info(),
             auth_request_params=auth_request_params,
         )
@@ -45,6 +58,9 @@ class OpenIDConnect:
     def get_oidc(self, app):
         provider_info = self.provider_info()
         o = OIDCAuthentication({"default": provider_info}, app)
+        # flask_pyoidc doesn't let us choose how the keys are fetched, so
+        # swap the key bundles pyoidc made for ones that use the cache.
+        share_keys(o.clients["default"]._client.keyjar, self.cache)
         return o
 
 
@@ -64,6 +80,15 @@ class TokenError(BaseException):
     pass
 
 
+@functools.lru_cache(maxsize=8)
+def load_public_key(public_key: bytes) -> JWK:
+    """Parse a PEM public key. Keys are cached, so each is only parsed once."""
+    try:
+        return JWK.load(public_key)
+    except josepy.errors.Error as exc:
+        raise TokenError("Could not load public key") from exc
+
+
 class TokenVerification:
     def __init__(self, jws, public_key):
         try:
@@ -72,11 +97,12 @@ class TokenVerification:
             raise TokenError("Could not deserialize JWS") from exc
         except UnicodeDecodeError as exc:
             raise TokenError("Invalid encoding of JWS parts") from exc
-        try:
-            self.public_key = JWK.load(public_key)
-        except josepy.errors.Error as exc:
-            raise TokenError("Could not load public key") from exc
-        if self.signed():
+        if isinstance(public_key, JWK):
+            self.public_key = public_key
+        else:
+            self.public_key = load_public_key(public_key)
+        self.verified = self.signed()
+        if self.verified:
             try:
                 self.jws_data = json.loads(self.jws.payload)
             except json.decoder.JSONDecodeError as exc:
@@ -196,3 +222,31 @@ class TokenVerification:
                 The system is in maintenance mode. Please try again later.
             """
         return None
+
+
+class TokenVerificationCache:
+    """
+    Remembers the result of verifying a JWS, so people refreshing the
+    forbidden page don't cost us a signature verification every time.
+
+    Entries are keyed by a digest of the compact JWS rather than the JWS
+    itself, to keep the memory used by a full cache bounded. Only tokens
+    whose signature checks out are kept, so junk can't push them out.
+    """
+
+    def __init__(self, public_key: bytes, maxsize: int):
+        self.public_key = public_key
+        self.cache: LRUCache = LRUCache(maxsize=maxsize)
+        self.lock = threading.Lock()
+
+    def verify(self, jws: bytes) -> TokenVerification:
+        """Return a (possibly cached) TokenVerification, raising TokenError like it does."""
+        key = hashlib.sha256(jws).digest()
+        with self.lock:
+            tv = self.cache.get(key)
+        if tv is None:
+            tv = TokenVerification(jws=jws, public_key=load_public_key(self.public_key))
+            if tv.verified:
+                with self.lock:
+                    self.cache[key] = tv
+        return tv
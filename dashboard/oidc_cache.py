@@ -0,0 +1,137 @@
+"""
+Share the OIDC provider's metadata and signing keys between workers.
+
+Left to itself each worker discovers the provider when it starts, and
+fetches its keys (the JWKS) on its first login and again every few minutes.
+Both are kept in OIDC_CACHE_DIR instead, so one fetch serves every worker
+in the container, including the ones gunicorn starts to replace workers
+that exit, until it is OIDC_CACHE_TTL seconds old. If the provider
+can't be reached in time, we carry on with the copy we have, however old.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+import requests
+from flask_pyoidc.provider_configuration import ProviderMetadata  # type: ignore
+from oic.utils.keyio import KeyBundle  # type: ignore
+from oic.utils.keyio import UpdateFailed  # type: ignore
+
+logger = logging.getLogger()
+
+
+class DiskCache(object):
+    """JSON documents kept in a directory, along with when they were fetched."""
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(name.encode("utf-8")).hexdigest()[:32] + ".json")
+
+    def get(self, name: str) -> Optional[tuple[float, dict]]:
+        """Return `(fetched_at, document)`, however old, or None."""
+        try:
+            with open(self._path(name), "r") as file:
+                entry = json.load(file)
+            return entry["fetched_at"], entry["document"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, KeyError):
+            logger.exception(f"Ignoring the cached copy of {name}")
+            return None
+
+    def set(self, name: str, document: dict) -> float:
+        """Store a document, returning the time it is stored as fetched at."""
+        fetched_at = time.time()
+        path = self._path(name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Other workers may be reading it, so swap the new one in whole.
+            with open(f"{path}.{os.getpid()}.tmp", "w") as file:
+                json.dump({"fetched_at": fetched_at, "name": name, "document": document}, file)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError:
+            logger.exception(f"Problem caching {name}")
+        return fetched_at
+
+    def is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl
+
+
+def discover(issuer: str, cache: DiskCache, timeout: float) -> ProviderMetadata:
+    """
+    The provider's metadata, from the cache while it's fresh. Raises if the
+    provider can't be reached and nothing was ever cached.
+    """
+    url = issuer.rstrip("/") + "/.well-known/openid-configuration"
+    cached = cache.get(url)
+    if cached is not None and cache.is_fresh(cached[0]):
+        return ProviderMetadata(**cached[1])
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        document = response.json()
+        if document["issuer"].rstrip("/") != issuer.rstrip("/"):
+            raise ValueError(f"Discovery document is for {document["issuer"]}, not {issuer}")
+    except (requests.RequestException, ValueError, TypeError, KeyError):
+        if cached is None:
+            raise
+        logger.exception(f"Problem discovering {issuer}, using the copy cached at {time.ctime(cached[0])}")
+        return ProviderMetadata(**cached[1])
+    cache.set(url, document)
+    logger.info(f"Discovered {issuer}")
+    return ProviderMetadata(**document)
+
+
+class SharedKeyBundle(KeyBundle):
+    """
+    The keys at a jwks_uri, fetched through the cache. Keys another worker
+    fetched are used while they're fresh, unless we have already loaded that
+    copy: pyoidc forces an update when it sees a key it doesn't know, and
+    that one needs to go to the provider.
+    """
+
+    def __init__(self, cache: DiskCache, **kwargs):
+        super().__init__(cache_time=cache.ttl, **kwargs)
+        self.cache = cache
+
+    def _load(self, fetched_at: float, jwks: dict):
+        self.imp_jwks = jwks
+        self.do_keys(jwks["keys"])
+        self.time_out = fetched_at + self.cache_time
+        self.last_updated = fetched_at
+
+    def do_remote(self):
+        cached = self.cache.get(self.source)
+        if cached is not None and cached[0] > self.last_updated and self.cache.is_fresh(cached[0]):
+            self._load(*cached)
+            return True
+        try:
+            updated = super().do_remote()
+        except UpdateFailed:
+            if cached is None:
+                raise
+            logger.exception(f"Problem fetching {self.source}, using the copy cached at {time.ctime(cached[0])}")
+            self._load(time.time(), cached[1])
+            return True
+        self.last_updated = self.cache.set(self.source, self.imp_jwks)
+        return updated
+
+
+def share_keys(keyjar, cache: DiskCache):
+    """Fetch the keys of every remote key bundle in a pyoidc KeyJar through the cache."""
+    for issuer, bundles in keyjar.issuer_keys.items():
+        keyjar.issuer_keys[issuer] = [
+            (
+                SharedKeyBundle(cache, source=bundle.source, verify_ssl=bundle.verify_ssl, timeout=bundle.timeout)
+                if bundle.remote
+                else bundle
+            )
+            for bundle in bundles
+        ]
@@ -6,6 +6,10 @@ import yaml
 
 logger = logging.getLogger()
 
+# The libyaml bindings parse an order of magnitude faster, fall back to the
+# pure Python loader where PyYAML was built without them.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class Application:
     def __init__(self, app_dict):
@@ -15,7 +19,7 @@ class Application:
 
     def _load_data(self):
         try:
-            stream = yaml.safe_load(self.app_dict)
+            stream = yaml.load(self.app_dict, Loader=SafeLoader)
         except yaml.YAMLError:
             logger.exception("Could not load YAML")
             stream = None
@@ -29,16 +33,21 @@ class Application:
         Parse apps.yml, return list of dicts, each dict is
         {'/some-redirect': 'https://some/destination'}
         """
-        redirects = []
         try:
             all_apps = self.apps["apps"]
         except (TypeError, KeyError):
-            return redirects
-        for app_entry in all_apps:
-            app = app_entry["application"]
-            yaml_vanity_url_list = app.get("vanity_url")
-            if not isinstance(yaml_vanity_url_list, list):
-                continue
-            for redirect in yaml_vanity_url_list:
-                redirects.append({redirect: app["url"]})
-        return redirects
+            return []
+        return vanity_urls(all_apps)
+
+
+def vanity_urls(all_apps):
+    """The vanity URLs of a list of app entries, in the same shape as above."""
+    redirects = []
+    for app_entry in all_apps:
+        app = app_entry["application"]
+        yaml_vanity_url_list = app.get("vanity_url")
+        if not isinstance(yaml_vanity_url_list, list):
+            continue
+        for redirect in yaml_vanity_url_list:
+            redirects.append({redirect: app["url"]})
+    return redirects
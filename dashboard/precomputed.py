@@ -0,0 +1,42 @@
+"""Responses whose body never changes while the app is running."""
+
+import functools
+import hashlib
+from typing import Callable, Union
+
+from flask import Response
+from flask import request
+
+
+class PrecomputedResponse(object):
+    """
+    Render a body once, the first time it's asked for, and serve it from
+    memory after that.
+
+    Successful responses carry a strong ETag, so a client (or a probe, or a
+    crawler) that already has the body gets a bodyless 304 back.
+    """
+
+    def __init__(self, render: Callable[[], Union[str, bytes]], mimetype: str = "text/html", status: int = 200):
+        self._render = render
+        self.mimetype = mimetype
+        self.status = status
+
+    @functools.cached_property
+    def body(self) -> bytes:
+        body = self._render()
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return body
+
+    @functools.cached_property
+    def etag(self) -> str:
+        return hashlib.sha256(self.body).hexdigest()[:32]
+
+    def __call__(self) -> Response:
+        response = Response(self.body, status=self.status, mimetype=self.mimetype)
+        # Only a 200 may turn into a 304, an error page is just served as is.
+        if self.status == 200:
+            response.set_etag(self.etag)
+            response.make_conditional(request)
+        return response
@@ -0,0 +1,154 @@
+"""
+Profile single requests in a running deployment.
+
+With PROFILER_ENABLED set, a request carrying a valid, signed
+`X-Dashboard-Profile` header is run under cProfile. The profile is written
+to PROFILER_DIR and its name returned in the `X-Dashboard-Profile-Id`
+response header. Fetch it from /_profiles/<name> (with the same header),
+either as a pstats file for snakeviz and friends, or with `?format=text` as
+a summary of where the time went.
+
+Tokens are signed with SECRET_KEY and expire, so only someone who can read
+the deployment's secrets can profile it. To make one:
+
+    SECRET_KEY=... python -m dashboard.profiler
+
+Under gevent, cProfile sees everything that runs on the worker's thread
+while it's enabled, including other requests' greenlets. Profile a quiet
+worker, or read the results with that in mind. Only one request per process
+is profiled at a time; others that arrive meanwhile are served as usual.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+
+from flask import Flask
+from flask import abort
+from flask import g
+from flask import request
+from flask import send_from_directory
+from itsdangerous import BadSignature
+from itsdangerous import TimestampSigner
+from werkzeug.utils import secure_filename
+
+from dashboard.sessions import sessionless
+
+logger = logging.getLogger()
+
+HEADER = "X-Dashboard-Profile"
+ID_HEADER = "X-Dashboard-Profile-Id"
+SALT = "sso-dashboard-profiler"
+PAYLOAD = "profile"
+
+# Held while a request is being profiled. Python only allows one profiler to
+# be active at a time, and under gevent requests overlap on the same thread.
+_profiling = threading.Lock()
+
+
+def signer(secret_key: str) -> TimestampSigner:
+    return TimestampSigner(secret_key, salt=SALT)
+
+
+def make_token(secret_key: str) -> str:
+    return signer(secret_key).sign(PAYLOAD).decode("utf-8")
+
+
+class Profiler(object):
+    def __init__(self, app: Flask):
+        self.app = app
+        self.directory = app.config["PROFILER_DIR"]
+        self.max_age = app.config["PROFILER_TOKEN_MAX_AGE"]
+        self.keep = app.config["PROFILER_KEEP"]
+        self.signer = signer(app.config["SECRET_KEY"])
+
+    def setup(self):
+        """Register the hooks, unless profiling is disabled."""
+        if not self.app.config["PROFILER_ENABLED"]:
+            return self
+        logger.warning(f"Request profiling is enabled, profiles are written to {self.directory}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.app.before_request(self.start)
+        self.app.after_request(self.stop)
+        self.app.teardown_request(self.abandon)
+        self.app.add_url_rule("/_profiles/<name>", "profile", self.download)
+        return self
+
+    def authorized(self) -> bool:
+        token = request.headers.get(HEADER)
+        if not token:
+            return False
+        try:
+            return self.signer.unsign(token, max_age=self.max_age) == PAYLOAD.encode("utf-8")
+        except BadSignature:
+            logger.warning("Rejected a request with a bad profiling token")
+            return False
+
+    def start(self):
+        # The download itself isn't worth profiling.
+        if request.endpoint == "profile" or not self.authorized():
+            return
+        if not _profiling.acquire(blocking=False):
+            logger.info(f"Not profiling {request.method} {request.path}, another request is being profiled")
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            _profiling.release()
+            logger.exception("Could not start profiling")
+            return
+        g.profile = profile
+
+    def _finish(self):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+            _profiling.release()
+        return profile
+
+    def stop(self, response):
+        profile = self._finish()
+        if profile is None:
+            return response
+        name = f"{int(time.time())}-{request.endpoint or 'none'}-{uuid.uuid4().hex[:8]}.pstats"
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        logger.info(f"Profiled {request.method} {request.path} as {name}")
+        response.headers[ID_HEADER] = name
+        return response
+
+    def abandon(self, exc):
+        """Stop profiling a request that ended without a response, e.g. on an unhandled error."""
+        self._finish()
+
+    def _prune(self):
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".pstats")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[: max(len(profiles) - self.keep, 0)]:
+            os.remove(entry.path)
+
+    @sessionless
+    def download(self, name):
+        if not self.authorized():
+            abort(404)
+        name = secure_filename(name)
+        if request.args.get("format") == "text":
+            path = os.path.join(self.directory, name)
+            if not os.path.isfile(path):
+                abort(404)
+            out = io.StringIO()
+            pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(50)
+            return out.getvalue(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+        return send_from_directory(self.directory, name, as_attachment=True)
+
+
+if __name__ == "__main__":
+    print(make_token(os.environ["SECRET_KEY"]))
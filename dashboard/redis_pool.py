@@ -0,0 +1,54 @@
+"""
+Redis clients sized for, and instrumented under, the gevent worker.
+
+Every greenlet in a worker shares one connection pool. A blocking pool makes
+greenlets queue for a free connection (up to REDIS_POOL_TIMEOUT seconds)
+rather than failing outright when the pool is exhausted; with gevent's
+monkey-patching that queue is cooperative. How long they queue for, and how
+long each command takes, is recorded so saturation shows up in metrics
+before it shows up as errors.
+"""
+
+import time
+
+import redis
+
+from dashboard.metrics import REDIS_COMMAND_ERRORS
+from dashboard.metrics import REDIS_COMMAND_SECONDS
+from dashboard.metrics import REDIS_POOL_WAIT_SECONDS
+
+
+class InstrumentedConnectionPool(redis.BlockingConnectionPool):
+    def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().get_connection(*args, **kwargs)
+        finally:
+            REDIS_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+
+class InstrumentedRedis(redis.Redis):
+    def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        except redis.RedisError:
+            REDIS_COMMAND_ERRORS.labels(command).inc()
+            raise
+        finally:
+            REDIS_COMMAND_SECONDS.labels(command).observe(time.perf_counter() - start)
+
+
+def connect(connector: str, **pool_options) -> InstrumentedRedis:
+    """
+    We should try doing what our dependencies prefer, falling back to what we
+    want to do only as a last resort. That is to say, try using a connection
+    string _first_, then treat it as a `host:port` pair.
+    """
+    try:
+        pool = InstrumentedConnectionPool.from_url(connector, **pool_options)
+    except ValueError:
+        host, _, port = connector.partition(":")
+        pool = InstrumentedConnectionPool(host=host, port=int(port), **pool_options)
+    return InstrumentedRedis(connection_pool=pool)
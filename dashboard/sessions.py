@@ -0,0 +1,131 @@
+"""Server-side sessions, stored in Redis."""
+
+import hashlib
+import logging
+import time
+from datetime import timedelta
+
+from flask import Flask
+from flask import Request
+from flask_session.redis import RedisSessionInterface  # type: ignore
+from flask_session.redis import RedisSession  # type: ignore
+from flask.sessions import SessionMixin
+from werkzeug.exceptions import HTTPException
+
+from dashboard.metrics import SESSION_OVERSIZED
+from dashboard.metrics import SESSION_SIZE
+
+logger = logging.getLogger()
+
+# The claims the dashboard actually reads (see User.email, User.group_membership
+# and the dashboard view).
+USERINFO_CLAIMS = frozenset(
+    {
+        "sub",
+        "user_id",
+        "email",
+        "groups",
+        "https://sso.mozilla.com/claim/emails",
+        "https://sso.mozilla.com/claim/groups",
+    }
+)
+# What's left of the ID token once it has been validated. Flask-pyoidc keeps
+# the raw JWT separately (`id_token_jwt`) for RP-initiated logout.
+ID_TOKEN_CLAIMS = frozenset({"sub", "iss", "aud", "exp", "iat", "auth_time", "nonce", "sid"})
+
+
+def sessionless(view):
+    """
+    Mark a view as never using the session, so requests to it never load
+    (or save) one from Redis.
+    """
+    view.sessionless = True
+    return view
+
+
+def trim_claims(data: dict) -> dict:
+    """Return a copy of the session data, keeping only the claims we use."""
+    trimmed = dict(data)
+    if isinstance(data.get("userinfo"), dict):
+        trimmed["userinfo"] = {k: v for k, v in data["userinfo"].items() if k in USERINFO_CLAIMS}
+    if isinstance(data.get("id_token"), dict):
+        trimmed["id_token"] = {k: v for k, v in data["id_token"].items() if k in ID_TOKEN_CLAIMS}
+    return trimmed
+
+
+class CompactRedisSessionInterface(RedisSessionInterface):
+    """
+    A RedisSessionInterface that can store a trimmed down copy of the claims
+    Auth0 hands us, and keeps track of how large sessions are.
+
+    Sessions are serialized with msgpack, a compact binary format, unless
+    SESSION_SERIALIZATION_FORMAT says otherwise.
+
+    Sessions are only written back to Redis when their contents changed, or
+    when their TTL was last refreshed more than SESSION_TTL_REFRESH_INTERVAL
+    seconds ago. Views mutate nested values (e.g. session["userinfo"][...])
+    which Flask can't see, so rather than trust `session.modified` we compare
+    against what we loaded.
+
+    Views marked with @sessionless (and static files) get a null session
+    instead, so they never touch Redis.
+    """
+
+    sessionless_endpoints = frozenset({"static"})
+
+    def __init__(self, app: Flask, *args, **kwargs):
+        super().__init__(app, *args, serialization_format=app.config["SESSION_SERIALIZATION_FORMAT"], **kwargs)
+        self.trim_claims = app.config["SESSION_TRIM_CLAIMS"]
+        self.size_warning = app.config["SESSION_SIZE_WARNING"]
+        self.ttl_refresh_interval = app.config["SESSION_TTL_REFRESH_INTERVAL"]
+
+    def _digest(self, session: RedisSession) -> bytes:
+        return hashlib.sha256(self.serializer.encode(dict(session))).digest()
+
+    def _is_sessionless(self, app: Flask, request: Request) -> bool:
+        # Flask only matches the URL once the session is open, so we need to
+        # match it ourselves.
+        adapter = app.create_url_adapter(request)
+        if adapter is None:
+            return False
+        try:
+            endpoint, _ = adapter.match()
+        except HTTPException:
+            # 404s, 405s and redirects, none of which need a session.
+            return True
+        if endpoint in self.sessionless_endpoints:
+            return True
+        return getattr(app.view_functions.get(endpoint), "sessionless", False)
+
+    def open_session(self, app: Flask, request: Request) -> SessionMixin:
+        # Without a cookie there is nothing to load from Redis anyway.
+        if app.config["SESSION_COOKIE_NAME"] in request.cookies and self._is_sessionless(app, request):
+            return self.make_null_session(app)
+        session = super().open_session(app, request)
+        session.loaded_digest = self._digest(session)
+        return session
+
+    def should_set_storage(self, app: Flask, session: RedisSession) -> bool:
+        if self._digest(session) != getattr(session, "loaded_digest", None):
+            return True
+        refreshed_at = dict.get(session, "_refreshed_at", 0)
+        return time.time() - refreshed_at >= self.ttl_refresh_interval
+
+    def _upsert_session(self, session_lifetime: timedelta, session: RedisSession, store_id: str) -> None:
+        data = dict(session)
+        data["_refreshed_at"] = int(time.time())
+        if self.trim_claims:
+            data = trim_claims(data)
+        serialized_session_data = self.serializer.encode(data)
+
+        size = len(serialized_session_data)
+        SESSION_SIZE.observe(size)
+        if size > self.size_warning:
+            SESSION_OVERSIZED.inc()
+            logger.warning(f"Session is {size} bytes, over the {self.size_warning} byte warning threshold")
+
+        self.client.set(
+            name=store_id,
+            value=serialized_session_data,
+            ex=int(session_lifetime.total_seconds()),
+        )
@@ -1,6 +1,54 @@
 $(document).ready(function(){
     'use strict';
 
+    // Same as Jinja's truncate(16, True, '..'), which used to do this
+    // server-side.
+    function truncate(name) {
+        if (name.length <= 16 + 5) {
+            return name;
+        }
+        return name.slice(0, 16 - 2) + '..';
+    }
+
+    // Fill in the app grid. The browser keeps the response and revalidates
+    // it with its ETag, so usually this is a 304.
+    var grid = $('#app-grid');
+    if (grid.data('src')) {
+        $.getJSON(grid.data('src'), function(data) {
+            window.sessionStorage.removeItem('app-grid-reloaded');
+            var list = grid.find('ul');
+            $.each(data.apps, function(_, app) {
+                var tile = $('<a class="app-tile" target="_blank">')
+                    .attr('href', app.url)
+                    .attr('data-id', app.name);
+                $('<div class="mui--text-center app-logo">')
+                    .append($('<img role="presentation" alt="">').attr('src', app.logo))
+                    .appendTo(tile);
+                $('<p class="mui--text-center app-name">')
+                    .attr('title', app.name)
+                    .text(truncate(app.name))
+                    .appendTo(tile);
+                list.append($('<li>').append(tile));
+            });
+        }).fail(function(xhr, textStatus) {
+            // An expired session gets a 401, or a redirect to the login page
+            // that the browser either can't follow (status 0) or that answers
+            // with HTML instead of JSON. Reloading takes the user through the
+            // login again, but only once, so a broken API can't loop.
+            var expired = xhr.status === 401 ||
+                (xhr.status === 0 && textStatus !== 'abort') ||
+                textStatus === 'parsererror';
+            if (expired && !window.sessionStorage.getItem('app-grid-reloaded')) {
+                window.sessionStorage.setItem('app-grid-reloaded', '1');
+                window.location.reload();
+                return;
+            }
+            $('<p class="mui--text-center app-grid-error" role="alert">')
+                .text('Your apps could not be loaded. Please reload the page to try again.')
+                .appendTo(grid);
+        });
+    }
+
     // This is the js that powers the search box
     $(':input[name=filter]')
         .on('input', function() {
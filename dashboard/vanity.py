@@ -1,38 +1,77 @@
+import functools
 import logging
+from flask import abort
 from flask import make_response
 from flask import redirect
-from flask import request
+from werkzeug.routing import BaseConverter
+from werkzeug.routing import ValidationError
 
-from dashboard.op import yaml_loader
+from dashboard.sessions import sessionless
 
 logger = logging.getLogger()
 
 
+class VanityConverter(BaseConverter):
+    """
+    Matches only the router's current vanity URLs. Any other path is left
+    unmatched, so Werkzeug answers it with a 404, or with a 405 when one of
+    our own routes has that path but not the method.
+    """
+
+    def __init__(self, url_map, router):
+        super().__init__(url_map)
+        self.router = router
+
+    def to_python(self, value):
+        if "/" + value not in self.router.redirects:
+            raise ValidationError()
+        return value
+
+
 class Router(object):
     def __init__(self, app, app_list):
         self.app = app
-        self.url_list = yaml_loader.Application(app_list.apps_yml).vanity_urls()
+        # Empty until there is a catalog, which may only arrive once the
+        # refresher has reached the CDN.
+        self.redirects = {}
+        app_list.subscribe(self.reload)
+        if app_list.catalog is not None:
+            self.reload(app_list.catalog)
+
+    @staticmethod
+    def _redirect_table(url_list):
+        """Flatten the [{'/some-redirect': 'https://some/destination'}] list into one dict."""
+        redirects = {}
+        for url in url_list:
+            redirects.update(url)
+        return redirects
+
+    def reload(self, catalog):
+        """Pick up the vanity URLs of a new catalog."""
+        self.redirects = self._redirect_table(catalog.vanity_urls)
 
     def setup(self):
-        for url in self.url_list:
-            for vanity_url in url.keys():
-                try:
-                    self.app.add_url_rule(vanity_url, vanity_url, self.redirect_url)
-                    self.app.add_url_rule(vanity_url + "/", vanity_url + "/", self.redirect_url)
-                except Exception:
-                    logger.exception(f"Could not add {vanity_url}")
-
-    def redirect_url(self):
-        vanity_url = "/" + request.url.split("/")[3]
-
-        for match in self.url_list:
-            for key in match.keys():
-                if key == vanity_url:
-                    resp = make_response(redirect(match[vanity_url], code=301))
-                    resp.headers["Cache-Control"] = (
-                        "no-store, no-cache, must-revalidate, " "post-check=0, pre-check=0, max-age=0"
-                    )
-                    resp.headers["Expires"] = "-1"
-                    return resp
-                else:
-                    pass
+        """
+        Vanity URLs all go through one endpoint, which looks the path up in
+        `self.redirects`. This way a new catalog can add or remove vanity URLs
+        without needing to register routes on a running app.
+
+        Any of our own routes take precedence, as Werkzeug prefers rules with
+        static parts over rules made only of a variable. The converter keeps
+        the endpoint from swallowing requests for those routes that use the
+        wrong method, like a GET of /csp_report.
+        """
+        self.app.url_map.converters["vanity"] = functools.partial(VanityConverter, router=self)
+        self.app.add_url_rule("/<vanity:vanity_url>", "vanity", self.redirect_url)
+        self.app.add_url_rule("/<vanity:vanity_url>/", "vanity", self.redirect_url)
+
+    @sessionless
+    def redirect_url(self, vanity_url):
+        destination = self.redirects.get("/" + vanity_url)
+        # The catalog may have changed since the converter matched.
+        if destination is None:
+            abort(404)
+        resp = make_response(redirect(destination, code=301))
+        resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, " "post-check=0, pre-check=0, max-age=0"
+        resp.headers["Expires"] = "-1"
+        return resp
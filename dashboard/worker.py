@@ -0,0 +1,78 @@
+"""
+What each worker process needs its own copy of.
+
+`create_app()` builds everything that can be shared between the workers
+gunicorn forks: the parsed catalog, compiled templates, parsed keys and OIDC
+provider metadata. With `preload_app` that is done once, in the master, and
+the workers share it copy-on-write.
+
+Connections and threads can't be shared like that. A worker would be using
+the master's sockets, and under gevent anything made before the worker
+monkey-patches itself blocks the whole worker rather than one greenlet. So
+the Redis client (and with it the session store and tile cache), the CDN's
+HTTP pool and the catalog refresher are only made in the process that uses
+them: from gunicorn's post_worker_init hook, or failing that on the first
+request the process handles.
+"""
+
+import logging
+import os
+
+from flask import Flask
+
+from dashboard.models.tile import TileCache
+from dashboard.sessions import CompactRedisSessionInterface
+
+logger = logging.getLogger()
+
+EXTENSION = "dashboard.worker"
+
+
+class Worker(object):
+    def __init__(self, app: Flask, cdn, connect):
+        """
+        :param app: The Flask app.
+        :param cdn: The CDNTransfer keeping the catalog.
+        :param connect: Called with the app, returns a verified redis.Redis client.
+        """
+        self.app = app
+        self.cdn = cdn
+        self.connect = connect
+        self.pid = None
+        self.tile_cache = None
+        app.extensions[EXTENSION] = self
+        # Flask opens the session before any before_request hook runs, so
+        # check in front of the whole app instead.
+        app.wsgi_app = StartedMiddleware(app.wsgi_app, self)  # type: ignore[method-assign]
+
+    def start(self):
+        """Open this process's connections and start its refresher, unless that's been done already."""
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        client = self.connect(self.app)
+        self.app.session_interface = CompactRedisSessionInterface(self.app, client=client)
+        self.tile_cache = TileCache(client, self.app.config["TILE_CACHE_TTL"])
+        self.cdn.connect()
+        self.cdn.start_refresher()
+        self.pid = pid
+        logger.info(f"Started worker {pid}")
+
+
+class StartedMiddleware(object):
+    """WSGI middleware that starts the worker before passing the request on."""
+
+    def __init__(self, wsgi_app, worker: Worker):
+        self.wsgi_app = wsgi_app
+        self.worker = worker
+
+    def __call__(self, environ, start_response):
+        self.worker.start()
+        return self.wsgi_app(environ, start_response)
+
+
+def start(app: Flask):
+    """Start the app's per-process resources, if it has any."""
+    worker = getattr(app, "extensions", {}).get(EXTENSION)
+    if worker is not None:
+        worker.start()
@@ -0,0 +1,23 @@
+"""
+End-to-end load tests.
+
+Runs the real app, under gunicorn and gevent as in production, against local
+stand-ins for everything it talks to:
+
+* a stub CDN serving a generated apps.yml (with ETags, so syncs get a 304);
+* Redis, either one you point it at or an in-process fake;
+* a fake OIDC issuer, just enough for Flask-pyoidc's discovery at startup.
+  Logged in sessions are minted straight into Redis.
+
+Then it drives /dashboard (and the /api/apps call the page makes), vanity
+redirects and /forbidden, and reports requests per second and latency
+percentiles for each. From the top of the repository:
+
+    python -m dashboard.assets      # once, so pages don't need sass
+    python -m loadtest --workers 3 --concurrency 50 --duration 30
+
+Like a deployment, the app writes the apps.yml it downloads to
+dashboard/data/. The load generator is a pool of threads in a single
+process, so at high request rates it may be what saturates first: watch
+its CPU use, and read the numbers as a lower bound.
+"""
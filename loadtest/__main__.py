@@ -0,0 +1,199 @@
+import argparse
+import base64
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import msgspec
+import redis
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from josepy.jwa import ES256
+from josepy.jwk import JWK
+from josepy.jws import JWS
+
+from benchmarks import catalog
+from dashboard.models.catalog import Catalog
+from loadtest import driver
+from loadtest import stubs
+
+ERROR_CODES = ["notingroup", "githubrequiremfa", "accesshasexpired", "incorrectaccount"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def mint_sessions(redis_url, count, n_apps):
+    """
+    Store logged in sessions straight into Redis, the way Flask-Session and
+    Flask-pyoidc would have after a real login, and return their ids.
+    """
+    client = redis.Redis.from_url(redis_url)
+    session_ids = []
+    for seed in range(count):
+        session = catalog.session_for(n_apps, seed=seed)
+        session.update(
+            current_provider="default",
+            last_authenticated=int(time.time()),
+            access_token="loadtest",
+            _permanent=True,
+        )
+        session_id = secrets.token_urlsafe(32)
+        client.set(f"session:{session_id}", msgspec.msgpack.encode(session), ex=3600)
+        session_ids.append(session_id)
+    return session_ids
+
+
+def forbidden_tokens(private_key, count):
+    """Error tokens like the ones Auth0 sends people to /forbidden with."""
+    key = JWK.load(
+        private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    )
+    tokens = []
+    for i in range(count):
+        payload = {"code": ERROR_CODES[i % len(ERROR_CODES)], "client": f"App {i}", "connection": "github"}
+        tokens.append(
+            JWS.sign(protect={"alg"}, payload=json.dumps(payload).encode(), key=key, alg=ES256).to_compact().decode()
+        )
+    return tokens
+
+
+def start_app(port, env, workers, log):
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "dashboard.app:app",
+        "--config=python:dashboard.gunicorn_conf",
+        "--worker-class=gevent",
+        f"--workers={workers}",
+        f"--bind=127.0.0.1:{port}",
+        "--timeout=60",
+    ]
+    return subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(process, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/about", timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+def report(name, concurrency, result):
+    percentiles = "".join(f"{result.percentile(p) * 1000:>9.1f}" for p in (50, 95, 99))
+    print(f"{name:<12}{concurrency:>6}{len(result.latencies):>10}{result.errors:>8}{result.rps:>10.1f}{percentiles}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Load test the dashboard locally.")
+    parser.add_argument("--workers", type=int, default=3, help="gunicorn workers")
+    parser.add_argument("--concurrency", default="10,50", help="concurrent clients, comma separated")
+    parser.add_argument("--duration", type=float, default=15, help="seconds to run each scenario for")
+    parser.add_argument("--apps", type=int, default=200, help="apps in the generated catalog")
+    parser.add_argument("--users", type=int, default=100, help="logged in sessions to spread requests over")
+    parser.add_argument("--scenarios", default="dashboard,vanity,forbidden")
+    parser.add_argument("--redis", help="Redis URL, by default an in-process fakeredis")
+    args = parser.parse_args(argv)
+
+    apps_yml = catalog.generate(args.apps)
+    vanity_urls = [url for redirect in Catalog(apps_yml).vanity_urls for url in redirect]
+    cdn = stubs.StubCDN(apps_yml).start()
+    workdir = tempfile.mkdtemp(prefix="sso-dashboard-loadtest-")
+    issuer = stubs.FakeIssuer(os.path.join(workdir, "issuer.pem"), os.path.join(workdir, "issuer.key")).start()
+    redis_url = args.redis or stubs.fake_redis()[1]
+    forbidden_key = ec.generate_private_key(ec.SECP256R1())
+    public_key = forbidden_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    port = free_port()
+    server_name = f"127.0.0.1:{port}"
+    os.makedirs(os.path.join(workdir, "prometheus"))
+    os.makedirs(os.path.join(workdir, "data"))
+    env = dict(
+        os.environ,
+        ENVIRONMENT="local",
+        FLASK_DEBUG="False",
+        TESTING="False",
+        SECRET_KEY=secrets.token_hex(32),
+        SERVER_NAME=server_name,
+        PREFERRED_URL_SCHEME="http",
+        CDN=cdn.url,
+        S3_BUCKET="",
+        REDIS_CONNECTOR=redis_url,
+        FORBIDDEN_PAGE_PUBLIC_KEY=base64.b64encode(public_key).decode(),
+        OIDC_DOMAIN=issuer.domain,
+        OIDC_CLIENT_ID="loadtest",
+        OIDC_CLIENT_SECRET="loadtest",
+        OIDC_REDIRECT_URI=f"http://{server_name}/redirect_uri",
+        REQUESTS_CA_BUNDLE=issuer.cert_path,
+        OIDC_CACHE_DIR=os.path.join(workdir, "oidc"),
+        CDN_DATA_DIR=os.path.join(workdir, "data"),
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, "prometheus"),
+        METRICS_PORT="",
+    )
+    log_path = os.path.join(workdir, "gunicorn.log")
+    with open(log_path, "wb") as log:
+        app = start_app(port, env, args.workers, log)
+        try:
+            if not wait_until_ready(app, port):
+                print(f"The app didn't start, see {log_path}", file=sys.stderr)
+                return 1
+
+            cookie_name = f"{server_name}_session"
+            cookies = [
+                {"Cookie": f"{cookie_name}={session_id}"}
+                for session_id in mint_sessions(redis_url, args.users, args.apps)
+            ]
+            tokens = forbidden_tokens(forbidden_key, 20)
+
+            def dashboard():
+                # The page, then the tiles it fetches, as the same user.
+                cookie = random.choice(cookies)
+                return [driver.Request("/dashboard", 200, cookie), driver.Request("/api/apps", 200, cookie)]
+
+            scenarios = {
+                "dashboard": dashboard,
+                "vanity": lambda: [driver.Request(random.choice(vanity_urls), 301)],
+                "forbidden": lambda: [driver.Request(f"/forbidden?error={random.choice(tokens)}", 400)],
+            }
+
+            print(
+                f"{'scenario':<12}{'conc':>6}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            )
+            for name in args.scenarios.split(","):
+                for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                    result = driver.run("127.0.0.1", port, scenarios[name], concurrency, args.duration)
+                    report(name, concurrency, result)
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+            cdn.stop()
+            issuer.stop()
+    print(f"gunicorn's log is in {log_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
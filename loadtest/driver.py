@@ -0,0 +1,76 @@
+"""Drive a scenario at a fixed concurrency and summarize the latencies."""
+
+import http.client
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+
+
+@dataclass
+class Request:
+    path: str
+    expected_status: int
+    headers: dict = field(default_factory=dict)
+
+
+@dataclass
+class Result:
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rps(self):
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p):
+        """Nearest-rank percentile, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def run(host: str, port: int, requests: Callable[[], list], concurrency: int, duration: float) -> Result:
+    """
+    Have `concurrency` clients, each on its own keep-alive connection, send
+    request after request for `duration` seconds. `requests()` returns the
+    requests for one iteration, e.g. a page and the API call it makes.
+    """
+    result = Result()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        latencies, errors = [], 0
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        while time.perf_counter() < deadline:
+            for request in requests():
+                start = time.perf_counter()
+                try:
+                    connection.request("GET", request.path, headers=request.headers)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection(host, port, timeout=30)
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if response.status != request.expected_status:
+                    errors += 1
+        connection.close()
+        with lock:
+            result.latencies.extend(latencies)
+            result.errors += errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,156 @@
+"""Local stand-ins for the CDN, the OIDC provider and Redis."""
+
+import datetime
+import hashlib
+import ipaddress
+import json
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+
+class _Server(object):
+    """An HTTP server on a free local port, served from a daemon thread."""
+
+    handler: type
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.port = self.httpd.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _CDNHandler(_Handler):
+    def do_GET(self):
+        cdn = self.server.stub
+        if self.path != "/apps.yml":
+            self.send_body(404, b"", "text/plain")
+        elif self.headers.get("If-None-Match") == cdn.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_body(200, cdn.apps_yml, "application/x-yaml", [("ETag", cdn.etag)])
+
+
+class StubCDN(_Server):
+    """Serves apps.yml, answering conditional GETs like CloudFront does."""
+
+    handler = _CDNHandler
+
+    def __init__(self, apps_yml: str):
+        super().__init__()
+        self.apps_yml = apps_yml.encode("utf-8")
+        self.etag = '"' + hashlib.md5(self.apps_yml).hexdigest() + '"'
+        self.url = f"http://127.0.0.1:{self.port}"
+
+
+class _IssuerHandler(_Handler):
+    def do_GET(self):
+        issuer = self.server.stub
+        if self.path == "/.well-known/openid-configuration":
+            self.send_body(200, json.dumps(issuer.metadata()).encode("utf-8"), "application/json")
+        elif self.path == "/jwks":
+            self.send_body(200, b'{"keys": []}', "application/json")
+        else:
+            self.send_body(404, b"", "text/plain")
+
+
+class FakeIssuer(_Server):
+    """
+    Answers OIDC discovery, over HTTPS as the app expects. Its certificate
+    is self-signed: point REQUESTS_CA_BUNDLE at `cert_path` for the app to
+    trust it.
+    """
+
+    handler = _IssuerHandler
+
+    def __init__(self, cert_path: str, key_path: str):
+        super().__init__()
+        self.domain = f"127.0.0.1:{self.port}"
+        self.issuer = f"https://{self.domain}"
+        self.cert_path = cert_path
+        _self_signed_certificate(cert_path, key_path)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+
+    def metadata(self):
+        return {
+            "issuer": self.issuer,
+            "authorization_endpoint": f"{self.issuer}/authorize",
+            "token_endpoint": f"{self.issuer}/oauth/token",
+            "userinfo_endpoint": f"{self.issuer}/userinfo",
+            "jwks_uri": f"{self.issuer}/jwks",
+            "response_types_supported": ["code"],
+            "subject_types_supported": ["public"],
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+
+def _self_signed_certificate(cert_path, key_path):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        )
+
+
+def fake_redis():
+    """A Redis server on a free local port, run in-process by fakeredis."""
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError as exc:
+        raise SystemExit("fakeredis is not installed, either install it or pass --redis") from exc
+
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"redis://{host}:{port}/0"
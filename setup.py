@@ -29,6 +29,11 @@ setup(
     license="Mozilla Public License 2.0",
     include_package_data=True,
     packages=find_packages(),
+    entry_points={
+        "console_scripts": [
+            "sso-dashboard-compile-catalog = dashboard.compile_catalog:main",
+        ],
+    },
     setup_requires=setup_requirements,
     test_suite="tests",
     tests_require=test_requirements,
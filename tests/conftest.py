@@ -0,0 +1,24 @@
+import pytest
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for the session store and the tile cache."""
+
+    def __init__(self):
+        self.data = {}
+        self.writes = 0
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, name, value, ex=None):
+        self.writes += 1
+        self.data[name] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
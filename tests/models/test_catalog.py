@@ -0,0 +1,132 @@
+from pathlib import Path
+import pytest
+from dashboard.models.catalog import Catalog, CatalogError
+
+apps = """
+apps:
+  - application:
+      name: "Zebra"
+      op: auth0
+      url: "https://zebra.example.com"
+      logo: "zebra.png"
+      display: true
+      authorized_users: []
+      authorized_groups: ["everyone"]
+      vanity_url:
+        - "/zebra"
+  - application:
+      name: "Missing Fields"
+      url: "https://missing.example.com"
+  - application:
+      name: "antelope"
+      op: auth0
+      url: "https://antelope.example.com"
+      logo: "antelope.png"
+      display: true
+      authorized_users: []
+      authorized_groups: ["team_moco"]
+"""
+
+
+def test_catalog_from_fixture():
+    apps_yml = (Path(__file__).parent.parent / "data" / "apps.yml").read_text()
+    catalog = Catalog(apps_yml, etag="some-etag")
+    assert catalog.etag == "some-etag"
+    assert len(catalog) > 0
+    assert {"/netlify": "https://some-url-for-netlify"} in catalog.vanity_urls
+
+
+def test_catalog_drops_invalid_entries():
+    catalog = Catalog(apps)
+    names = [entry["application"]["name"] for entry in catalog.apps["apps"]]
+    assert names == ["antelope", "Zebra"]
+
+
+def test_catalog_drops_malformed_entries():
+    malformed = (
+        apps
+        + """
+  - application:
+      op: auth0
+      url: "https://no-name.example.com"
+  - application:
+      name: 5
+  - application: null
+  - "not even a mapping"
+"""
+    )
+    catalog = Catalog(malformed)
+    names = [entry["application"]["name"] for entry in catalog.apps["apps"]]
+    assert names == ["antelope", "Zebra"]
+    assert catalog.rejected == 5
+
+
+def test_catalog_normalizes_display():
+    quoted = apps.replace("display: true", 'display: "False"', 1)
+    catalog = Catalog(quoted)
+    zebra = next(entry for entry in catalog.apps["apps"] if entry["application"]["name"] == "Zebra")
+    assert zebra["application"]["display"] is False
+    assert catalog.everyone == []
+    assert Catalog(apps.replace("display: true", 'display: "True"', 1)).everyone == [1]
+
+
+def test_catalog_vanity_urls():
+    assert Catalog(apps).vanity_urls == [{"/zebra": "https://zebra.example.com"}]
+
+
+def test_catalog_invalid_yaml():
+    with pytest.raises(CatalogError):
+        Catalog("invalid: : : yaml")
+    with pytest.raises(CatalogError):
+        Catalog("not_apps: []")
+
+
+def test_catalog_index():
+    catalog = Catalog(
+        """
+apps:
+  - application: {name: "A", op: auth0, url: "https://a", logo: a.png, display: true,
+                  authorized_users: [], authorized_groups: [everyone]}
+  - application: {name: "B", op: auth0, url: "https://b", logo: b.png, display: true,
+                  authorized_users: ["jdoe@example.com"], authorized_groups: [team_moco]}
+  - application: {name: "C", op: auth0, url: "https://c", logo: c.png, display: false,
+                  authorized_users: [], authorized_groups: [team_moco]}
+  - application: {name: "D", op: auth0, url: "https://d", logo: d.png, display: true,
+                  authorized_users: [], authorized_groups: [team_mofo]}
+"""
+    )
+
+    def names(groups, identifiers):
+        return [entry["application"]["name"] for entry in catalog.entries(catalog.authorized_ids(groups, identifiers))]
+
+    assert names([], []) == ["A"]
+    assert names(["team_moco"], []) == ["A", "B"]
+    assert names([], ["jdoe@example.com"]) == ["A", "B"]
+    assert names(["team_moco", "team_mofo"], ["jdoe@example.com"]) == ["A", "B", "D"]
+
+
+def test_compiled_round_trip():
+    catalog = Catalog(apps, etag="some-etag")
+    compiled = Catalog.from_compiled(catalog.compile(), etag="other-etag")
+    assert compiled.etag == "other-etag"
+    assert compiled.version == catalog.version
+    assert compiled.apps == catalog.apps
+    assert compiled.vanity_urls == catalog.vanity_urls
+    assert compiled.rejected == catalog.rejected == 1
+    assert (compiled.everyone, compiled.by_group, compiled.by_user) == (
+        catalog.everyone,
+        catalog.by_group,
+        catalog.by_user,
+    )
+    assert compiled.authorized_ids(["team_moco"], []) == catalog.authorized_ids(["team_moco"], [])
+
+
+def test_compiled_invalid():
+    with pytest.raises(CatalogError):
+        Catalog.from_compiled("not json")
+    with pytest.raises(CatalogError):
+        Catalog.from_compiled('{"format": 999, "version": "x", "apps": []}')
+    with pytest.raises(CatalogError):
+        Catalog.from_compiled('{"apps": []}')
+    with pytest.raises(CatalogError):
+        Catalog.from_compiled('{"format": 2, "version": "x", "rejected": 0, "apps": [], "vanity_urls": []}')
@@ -1,44 +1,90 @@
+import json
 import pytest
 import os
+import redis
+import threading
 import urllib3
+from pathlib import Path
+from prometheus_client import REGISTRY
 from unittest import mock
+from dashboard.models.catalog import Catalog
 from dashboard.models.tile import __file__ as module_file
 from dashboard.models.tile import CDNTransfer
+from dashboard.models.tile import TileCache
+from dashboard.models.tile import tiles
+from dashboard.models.user import User
 
 
 class MockAppConfig:
     CDN = "http://mock-cdn.com"
+    CDN_REFRESH_INTERVAL = 0
+    CDN_REFRESH_JITTER = 0
+    CDN_CONNECT_TIMEOUT = 1
+    CDN_READ_TIMEOUT = 1
+    CDN_RETRIES = 0
+    CDN_RETRY_BACKOFF = 0
+    CDN_SEED_APPS_YML = ""
+    CDN_STALE_AFTER = 300
+    CDN_DATA_DIR = ""
+    CDN_COMPILED_CATALOG = ""
 
 
 @pytest.fixture
-def cdn_transfer():
+def cdn_transfer(mocker):
+    # Keep compiled catalogs out of the source tree, see the tests below for those.
+    mocker.patch.object(CDNTransfer, "_load_compiled_catalog", return_value=None)
+    mocker.patch.object(CDNTransfer, "_write_compiled_catalog")
     app_config = MockAppConfig()
     return CDNTransfer(app_config)
 
 
-def test_is_updated_etag_mismatch(mocker, cdn_transfer):
-    mock_request = mocker.patch("urllib3.PoolManager.request")
-    mock_request.return_value.headers = {"ETag": "new-etag"}
-    mocker.patch.object(cdn_transfer, "_etag", return_value="old-etag")
-
-    assert cdn_transfer.is_updated() is True
+@pytest.fixture
+def data_dir(monkeypatch, tmp_path):
+    """Point CDNTransfer at a temporary data directory."""
+    (tmp_path / "data").mkdir()
+    monkeypatch.setattr(MockAppConfig, "CDN_DATA_DIR", str(tmp_path / "data"))
+    return tmp_path / "data"
 
 
-def test_is_updated_etag_match(mocker, cdn_transfer):
-    mock_request = mocker.patch("urllib3.PoolManager.request")
-    mock_request.return_value.headers = {"ETag": "matching-etag"}
+def test_download_config_sends_etag(mocker, cdn_transfer):
+    mock_http = mocker.patch.object(cdn_transfer, "http")
+    mock_http.request.return_value.status = 304
     mocker.patch.object(cdn_transfer, "_etag", return_value="matching-etag")
 
-    assert cdn_transfer.is_updated() is False
+    assert cdn_transfer._download_config() is False
+    mock_http.request.assert_called_once_with(
+        "GET", "http://mock-cdn.com/apps.yml", headers={"If-None-Match": "matching-etag"}
+    )
 
 
-def test_update_etag(mocker, cdn_transfer):
-    mock_open = mocker.patch("builtins.open", mocker.mock_open())
+def test_download_config_not_modified(mocker, cdn_transfer):
+    mock_http = mocker.patch.object(cdn_transfer, "http")
+    mock_http.request.return_value.status = 304
+    mock_open = mocker.patch("builtins.open", mocker.mock_open(read_data="old-etag"))
+
+    assert cdn_transfer._download_config() is False
+    mock_open().write.assert_not_called()
+
+
+def test_shared_pool_is_reused(cdn_transfer):
+    http = cdn_transfer.http
+    cdn_transfer.sync_config()
+    assert cdn_transfer.http is http
+
+
+def test_connect_replaces_pool(cdn_transfer):
+    http = cdn_transfer.http
+    cdn_transfer.connect()
+    assert cdn_transfer.http is not http
+
+
+def test_update_etag(cdn_transfer, tmp_path):
+    cdn_transfer.app_config.CDN_DATA_DIR = str(tmp_path)
 
     cdn_transfer._update_etag("new-etag")
 
-    mock_open.assert_called_once_with(os.path.join(os.path.dirname(module_file), "../data/apps.yml-etag"), "w+")
-    mock_open().write.assert_called_once_with("new-etag")
+    assert (tmp_path / "apps.yml-etag").read_text() == "new-etag"
+    assert [path.name for path in tmp_path.iterdir()] == ["apps.yml-etag"]
 
 
 def test_etag_file_exists(mocker, cdn_transfer):
@@ -55,31 +101,43 @@ def test_etag_file_missing(mocker, cdn_transfer):
     assert cdn_transfer._etag() == "12345678"
 
 
-# NOTE: Temporarily disabling this test until we have a reliable means of patching out
-#       `urllib3` calls. Even after multiple attempts, the call to `request` still
-#       tries to resolve the mock domain in the mocked CDN object.
-#       References:
-#       - https://mozilla-hub.atlassian.net/jira/software/c/projects/IAM/issues/IAM-1403
-#
-@pytest.mark.skip(reason="Cannot properly mock `urllib3`'s `request` call.")
-def test_download_config(mocker, cdn_transfer):
+def test_download_config(mocker, cdn_transfer, tmp_path):
     mock_response = mock.Mock()
     mock_response.status = 200
     mock_response.headers = {"ETag": "new-etag"}
     mock_response.data = b"mock apps.yml content"
-    with mock.patch("urllib3.PoolManager") as mock_pool_manager, mock.patch("os.fsync") as mock_fsync, mock.patch(
-        "builtins.open", mock.mock_open()
-    ) as mock_open_yml, mock.patch("builtins.open", mock.mock_open()) as mock_open_etag:
-        mock_http = mock_pool_manager.return_value
-        mock_http.request.return_value = mock_response
-        mock_open_yml.return_value.fileno.return_value = 3
-        cdn_transfer._download_config()
+    mock_http = mocker.patch.object(cdn_transfer, "http")
+    mock_http.request.return_value = mock_response
+    mocker.patch.object(cdn_transfer, "_etag", return_value="old-etag")
+    mock_fsync = mocker.patch("os.fsync")
+    cdn_transfer.app_config.CDN_DATA_DIR = str(tmp_path)
+
+    assert cdn_transfer._download_config() is True
+
+    assert (tmp_path / "apps.yml").read_bytes() == b"mock apps.yml content"
+    assert (tmp_path / "apps.yml-etag").read_text() == "new-etag"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["apps.yml", "apps.yml-etag"]
+    mock_fsync.assert_called_once()
 
-        mock_open_yml.assert_any_call(os.path.join(os.path.dirname(module_file), "../data/apps.yml"), "wb")
-        mock_open_yml().write.assert_called_once_with(b"mock apps.yml content")
-        mock_fsync().assert_called_once_with(3)
-        mock_open_etag.assert_any_call(os.path.join(os.path.dirname(module_file), "../data/apps.yml-etag"), "w+")
-        mock_open_etag().write.assert_called_once_with("new-etag")
+
+def test_download_config_is_never_seen_half_written(mocker, cdn_transfer, tmp_path):
+    cdn_transfer.app_config.CDN_DATA_DIR = str(tmp_path)
+    (tmp_path / "apps.yml").write_text("old apps.yml")
+    (tmp_path / "apps.yml-etag").write_text("old-etag")
+    mock_http = mocker.patch.object(cdn_transfer, "http")
+    mock_http.request.return_value = mock.Mock(status=200, headers={"ETag": "new-etag"}, data=b"new apps.yml")
+    seen = []
+
+    def read_mid_write(fd):
+        # Another worker starting while the download is being written.
+        seen.append(((tmp_path / "apps.yml").read_text(), (tmp_path / "apps.yml-etag").read_text()))
+
+    mocker.patch("os.fsync", side_effect=read_mid_write)
+    cdn_transfer._download_config()
+
+    assert seen == [("old apps.yml", "old-etag")]
+    assert (tmp_path / "apps.yml").read_text() == "new apps.yml"
+    assert (tmp_path / "apps.yml-etag").read_text() == "new-etag"
 
 
 def test_download_config_http_error(mocker, cdn_transfer):
@@ -98,16 +156,8 @@ def test_load_apps_yml(mocker, cdn_transfer):
     assert cdn_transfer.apps_yml == "mock apps.yml content"
 
 
-# NOTE: Temporarily disabling this test until we have a reliable means of patching out
-#       `urllib3` calls. Even after multiple attempts, the call to `request` still
-#       tries to resolve the mock domain in the mocked CDN object.
-#       References:
-#       - https://mozilla-hub.atlassian.net/jira/software/c/projects/IAM/issues/IAM-1403
-#
-@pytest.mark.skip(reason="Cannot properly mock `urllib3`'s `request` call.")
 def test_sync_config_update(mocker, cdn_transfer):
-    mocker.patch.object(CDNTransfer, "is_updated", return_value=True)
-    mock_download = mocker.patch.object(CDNTransfer, "_download_config")
+    mock_download = mocker.patch.object(CDNTransfer, "_download_config", return_value=True)
     mock_load = mocker.patch.object(CDNTransfer, "_load_apps_yml")
 
     cdn_transfer.sync_config()
@@ -116,37 +166,323 @@ def test_sync_config_update(mocker, cdn_transfer):
     mock_load.assert_called_once()
 
 
-# NOTE: Temporarily disabling this test until we have a reliable means of patching out
-#       `urllib3` calls. Even after multiple attempts, the call to `request` still
-#       tries to resolve the mock domain in the mocked CDN object.
-#       References:
-#       - https://mozilla-hub.atlassian.net/jira/software/c/projects/IAM/issues/IAM-1403
-#
-@pytest.mark.skip(reason="Cannot properly mock `urllib3`'s `request` call.")
 def test_sync_config_no_update(mocker, cdn_transfer):
-    mocker.patch.object(CDNTransfer, "is_updated", return_value=False)
-    mock_download = mocker.patch.object(CDNTransfer, "_download_config")
+    mock_download = mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
     mock_load = mocker.patch.object(CDNTransfer, "_load_apps_yml")
 
     cdn_transfer.sync_config()
 
-    mock_download.assert_not_called()
+    mock_download.assert_called_once()
     mock_load.assert_called_once()
 
 
-# NOTE: Temporarily disabling this test until we have a reliable means of patching out
-#       `urllib3` calls. Even after multiple attempts, the call to `request` still
-#       tries to resolve the mock domain in the mocked CDN object.
-#       References:
-#       - https://mozilla-hub.atlassian.net/jira/software/c/projects/IAM/issues/IAM-1403
-#
-@pytest.mark.skip(reason="Cannot properly mock `urllib3`'s `request` call.")
+@pytest.mark.parametrize(
+    "download, outcome",
+    [
+        (mock.Mock(return_value=True), "updated"),
+        (mock.Mock(return_value=False), "not_modified"),
+        (mock.Mock(side_effect=urllib3.exceptions.HTTPError), "error"),
+    ],
+)
+def test_sync_config_metrics(mocker, cdn_transfer, download, outcome):
+    mocker.patch.object(CDNTransfer, "_download_config", download)
+    mocker.patch.object(CDNTransfer, "_load_apps_yml")
+    before = REGISTRY.get_sample_value("dashboard_cdn_syncs_total", {"outcome": outcome}) or 0
+
+    cdn_transfer.sync_config()
+
+    assert REGISTRY.get_sample_value("dashboard_cdn_syncs_total", {"outcome": outcome}) == before + 1
+
+
 def test_sync_config_download_error(mocker, cdn_transfer):
-    mocker.patch.object(CDNTransfer, "is_updated", return_value=True)
-    mock_download = mocker.patch.object(CDNTransfer, "_download_config", side_effect=Exception("Test Exception"))
+    # What urllib3 raises once the pool's Retry policy is used up.
+    assert cdn_transfer.http.connection_pool_kw["retries"].total == MockAppConfig.CDN_RETRIES
+    errors = REGISTRY.get_sample_value("dashboard_cdn_syncs_total", {"outcome": "error"}) or 0
+    mock_http = mocker.patch.object(cdn_transfer, "http")
+    mock_http.request.side_effect = urllib3.exceptions.MaxRetryError(None, cdn_transfer.url)
     mock_load = mocker.patch.object(CDNTransfer, "_load_apps_yml")
+    cdn_transfer.apps_yml = "apps: []"
+    mock_open = mocker.patch("builtins.open", mocker.mock_open(read_data="etag-1"))
 
     cdn_transfer.sync_config()
 
-    mock_download.assert_called_once()
-    mock_load.assert_not_called()  # if download fails, it shouldn't try to load
+    mock_http.request.assert_called_once()
+    mock_load.assert_not_called()  # we carry on with the apps.yml we have
+    mock_open().write.assert_not_called()
+    mocker.stopall()
+    assert REGISTRY.get_sample_value("dashboard_cdn_syncs_total", {"outcome": "error"}) == errors + 1
+    assert not cdn_transfer.fresh
+
+
+def test_load_catalog_once_per_etag(mocker, cdn_transfer):
+    cdn_transfer.apps_yml = "apps: []"
+    mocker.patch.object(cdn_transfer, "_etag", return_value="etag-1")
+    cdn_transfer._load_catalog()
+    catalog = cdn_transfer.catalog
+    assert len(catalog) == 0
+
+    cdn_transfer._load_catalog()
+    assert cdn_transfer.catalog is catalog
+
+    cdn_transfer._etag.return_value = "etag-2"
+    cdn_transfer._load_catalog()
+    assert cdn_transfer.catalog is not catalog
+    assert cdn_transfer.catalog.etag == "etag-2"
+
+
+def test_refresher_syncs_in_background(mocker, cdn_transfer):
+    synced = threading.Event()
+    mock_sync = mocker.patch.object(cdn_transfer, "sync_config", side_effect=synced.set)
+
+    cdn_transfer.start_refresher()
+    assert synced.wait(timeout=5), "refresher never called sync_config"
+    cdn_transfer.stop_refresher()
+
+    assert mock_sync.called
+    assert cdn_transfer._refresher is None
+
+
+def test_new_catalog_is_swapped_in(mocker, cdn_transfer):
+    etag = mocker.patch.object(cdn_transfer, "_etag", return_value="etag-1")
+    cdn_transfer.apps_yml = "apps: []"
+    cdn_transfer._load_catalog()
+    old_catalog = cdn_transfer.catalog
+    subscriber = mocker.Mock()
+    cdn_transfer.subscribe(subscriber)
+
+    def download():
+        etag.return_value = "etag-2"
+        cdn_transfer.apps_yml = "apps: []\n"
+        return True
+
+    mocker.patch.object(cdn_transfer, "_download_config", side_effect=download)
+    cdn_transfer.sync_config()
+
+    assert cdn_transfer.catalog is not old_catalog
+    assert cdn_transfer.catalog.etag == "etag-2"
+    subscriber.assert_called_once_with(cdn_transfer.catalog)
+
+
+def test_bad_catalog_keeps_the_old_one(mocker, cdn_transfer):
+    etag = mocker.patch.object(cdn_transfer, "_etag", return_value="etag-1")
+    cdn_transfer.apps_yml = "apps: []"
+    cdn_transfer._load_catalog()
+    old_catalog = cdn_transfer.catalog
+
+    etag.return_value = "etag-2"
+    cdn_transfer.apps_yml = "invalid: : : yaml"
+    cdn_transfer.sync_config()
+
+    assert cdn_transfer.catalog is old_catalog
+
+
+def test_compiled_catalog_is_written_and_reused(mocker, data_dir):
+    apps_yml = (Path(__file__).parent.parent / "data" / "apps.yml").read_text()
+    (data_dir / "apps.yml").write_text(apps_yml)
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    first = CDNTransfer(MockAppConfig()).catalog
+    assert (data_dir / "apps.json").exists()
+
+    parse = mocker.patch("dashboard.models.tile.Catalog.__init__")
+    second = CDNTransfer(MockAppConfig()).catalog
+    parse.assert_not_called()
+    assert second.version == first.version
+    assert second.apps == first.apps
+    assert second.vanity_urls == first.vanity_urls
+    assert second.by_group == first.by_group
+
+
+def test_compiled_catalog_written_beside_other_workers(mocker, data_dir):
+    # Another worker, part way through writing its own copy.
+    (data_dir / "apps.json.1.tmp").write_text('{"format": ')
+    (data_dir / "apps.yml").write_text("apps: []")
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    replace = mocker.patch("os.replace", wraps=os.replace)
+    CDNTransfer(MockAppConfig())
+    compiled = str(data_dir / "apps.json")
+    replace.assert_called_once_with(f"{compiled}.{os.getpid()}.tmp", compiled)
+    assert (data_dir / "apps.json.1.tmp").read_text() == '{"format": '
+    assert len(Catalog.from_compiled((data_dir / "apps.json").read_text())) == 0
+
+
+def test_stale_compiled_catalog_is_ignored(mocker, data_dir):
+    (data_dir / "apps.json").write_text(Catalog("apps: []").compile())
+    apps_yml = (Path(__file__).parent.parent / "data" / "apps.yml").read_text()
+    (data_dir / "apps.yml").write_text(apps_yml)
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    catalog = CDNTransfer(MockAppConfig()).catalog
+    assert len(catalog) == len(Catalog(apps_yml))
+    assert Catalog.from_compiled((data_dir / "apps.json").read_text()).version == catalog.version
+
+
+def test_broken_compiled_catalog_is_ignored(mocker, data_dir):
+    (data_dir / "apps.json").write_text("{")
+    (data_dir / "apps.yml").write_text("apps: []")
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    assert len(CDNTransfer(MockAppConfig()).catalog) == 0
+
+
+def test_starts_from_disk_without_the_cdn(mocker, data_dir):
+    (data_dir / "apps.yml").write_text((Path(__file__).parent.parent / "data" / "apps.yml").read_text())
+    (data_dir / "apps.yml-etag").write_text("etag-1")
+    download = mocker.patch.object(CDNTransfer, "_download_config")
+    cdn_transfer = CDNTransfer(MockAppConfig())
+    download.assert_not_called()
+    assert cdn_transfer.catalog.etag == "etag-1"
+    assert len(cdn_transfer.catalog) > 0
+    assert not cdn_transfer.fresh
+
+
+def test_starts_from_the_seed_catalog(mocker, data_dir, tmp_path):
+    (data_dir / "apps.yml").write_text("")
+    seed = tmp_path / "seed.yml"
+    seed.write_text((Path(__file__).parent.parent / "data" / "apps.yml").read_text())
+    app_config = MockAppConfig()
+    app_config.CDN_SEED_APPS_YML = str(seed)
+    download = mocker.patch.object(CDNTransfer, "_download_config")
+    cdn_transfer = CDNTransfer(app_config)
+    download.assert_not_called()
+    assert cdn_transfer.catalog.version == Catalog(seed.read_text()).version
+
+
+def test_waits_for_the_cdn_without_a_local_catalog(mocker, data_dir):
+    def download(self):
+        self.apps_yml = "apps: []"
+        return True
+
+    mocker.patch.object(CDNTransfer, "_download_config", autospec=True, side_effect=download)
+    cdn_transfer = CDNTransfer(MockAppConfig())
+    assert cdn_transfer.catalog is not None
+    assert cdn_transfer.fresh
+
+
+def test_picks_up_apps_yml_downloaded_by_another_worker(mocker, data_dir):
+    (data_dir / "apps.yml").write_text("apps: []")
+    (data_dir / "apps.yml-etag").write_text("etag-1")
+    cdn_transfer = CDNTransfer(MockAppConfig())
+    assert len(cdn_transfer.catalog) == 0
+
+    (data_dir / "apps.yml").write_text((Path(__file__).parent.parent / "data" / "apps.yml").read_text())
+    (data_dir / "apps.yml-etag").write_text("etag-2")
+    mocker.patch.object(cdn_transfer, "_download_config", return_value=False)
+    cdn_transfer.sync_config()
+    assert cdn_transfer.catalog.etag == "etag-2"
+    assert len(cdn_transfer.catalog) > 0
+
+
+def test_fresh(mocker, cdn_transfer):
+    mocker.patch.object(cdn_transfer, "_download_config", return_value=False)
+    cdn_transfer.sync_config()
+    assert cdn_transfer.fresh
+    cdn_transfer.checked_at -= MockAppConfig.CDN_STALE_AFTER
+    assert not cdn_transfer.fresh
+
+    mocker.patch.object(cdn_transfer, "_download_config", side_effect=urllib3.exceptions.HTTPError)
+    cdn_transfer.sync_config()
+    assert not cdn_transfer.fresh
+
+
+@pytest.fixture
+def tile_user():
+    with open(Path(__file__).parent.parent / "data" / "userinfo.json") as f:
+        return User(session=json.load(f), app_config=None)
+
+
+@pytest.fixture
+def catalog():
+    return Catalog((Path(__file__).parent.parent / "data" / "apps.yml").read_text())
+
+
+def test_tile_cache_hit(mocker, fake_redis, tile_user, catalog):
+    tile_cache = TileCache(fake_redis, ttl=60)
+    apps = tile_cache.apps(tile_user, catalog)
+    assert apps == tile_user.apps(catalog)
+
+    app_ids = mocker.patch.object(tile_user, "app_ids")
+    assert tile_cache.apps(tile_user, catalog) == apps
+    app_ids.assert_not_called()
+
+
+def test_tile_cache_keyed_by_catalog_version(fake_redis, tile_user, catalog):
+    tile_cache = TileCache(fake_redis, ttl=60)
+    new_catalog = Catalog("apps: []")
+    assert tile_cache.key(tile_user, catalog) != tile_cache.key(tile_user, new_catalog)
+    tile_cache.apps(tile_user, catalog)
+    assert tile_cache.apps(tile_user, new_catalog) == []
+
+
+def test_tile_cache_redis_errors(mocker, tile_user, catalog):
+    client = mocker.Mock()
+    client.get.side_effect = redis.ConnectionError
+    assert TileCache(client, ttl=60).apps(tile_user, catalog) == tile_user.apps(catalog)
+
+
+def test_tiles_only_expose_what_is_drawn(tile_user, catalog):
+    apps = tile_user.apps(catalog)
+    result = tiles(apps, "https://cdn.example.com")
+    assert len(result) == len(apps)
+    for tile, entry in zip(result, apps):
+        assert tile == {
+            "name": entry["application"]["name"],
+            "url": entry["application"]["url"],
+            "logo": f"https://cdn.example.com/images/{entry["application"]["logo"]}",
+        }
+
+
+def test_configured_data_dir(mocker, tmp_path):
+    app_config = MockAppConfig()
+    app_config.CDN_DATA_DIR = str(tmp_path)
+    (tmp_path / "apps.yml").write_text((Path(__file__).parent.parent / "data" / "apps.yml").read_text())
+    (tmp_path / "apps.yml-etag").write_text("etag-1")
+    mocker.patch.object(CDNTransfer, "_download_config")
+    cdn_transfer = CDNTransfer(app_config)
+    assert cdn_transfer.catalog.etag == "etag-1"
+    assert (tmp_path / "apps.json").exists()
+
+
+@pytest.fixture
+def published(tmp_path):
+    """An app config with apps.yml on disk, and the catalog compiled from it published next to it."""
+    app_config = MockAppConfig()
+    app_config.CDN_DATA_DIR = str(tmp_path / "data")
+    app_config.CDN_COMPILED_CATALOG = str(tmp_path / "apps.json")
+    (tmp_path / "data").mkdir()
+    apps_yml = (Path(__file__).parent.parent / "data" / "apps.yml").read_text()
+    (tmp_path / "data" / "apps.yml").write_text(apps_yml)
+    (tmp_path / "apps.json").write_text(Catalog(apps_yml).compile())
+    return app_config
+
+
+def test_published_catalog_is_used(mocker, published):
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    parse = mocker.patch("dashboard.models.tile.Catalog.__init__")
+    catalog = CDNTransfer(published).catalog
+    parse.assert_not_called()
+    assert len(catalog) > 0
+    assert Path(published.CDN_DATA_DIR, "apps.json").exists()
+
+
+def test_published_catalog_from_the_cdn(mocker, published):
+    compiled = Path(published.CDN_COMPILED_CATALOG).read_bytes()
+    published.CDN_COMPILED_CATALOG = "http://mock-cdn.com/apps.json"
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    mocker.patch.object(CDNTransfer, "_pool_manager")
+    CDNTransfer._pool_manager.return_value.request.return_value = mock.Mock(status=200, data=compiled)
+    parse = mocker.patch("dashboard.models.tile.Catalog.__init__")
+    cdn_transfer = CDNTransfer(published)
+    parse.assert_not_called()
+    cdn_transfer.http.request.assert_called_once_with("GET", "http://mock-cdn.com/apps.json")
+    assert len(cdn_transfer.catalog) > 0
+
+
+def test_published_catalog_for_another_apps_yml(mocker, published):
+    Path(published.CDN_COMPILED_CATALOG).write_text(Catalog("apps: []").compile())
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    catalog = CDNTransfer(published).catalog
+    assert len(catalog) == len(Catalog(Path(published.CDN_DATA_DIR, "apps.yml").read_text()))
+
+
+def test_published_catalog_missing(mocker, published):
+    Path(published.CDN_COMPILED_CATALOG).unlink()
+    mocker.patch.object(CDNTransfer, "_download_config", return_value=False)
+    assert len(CDNTransfer(published).catalog) > 0
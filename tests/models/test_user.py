@@ -3,6 +3,7 @@ from pathlib import Path
 import os
 
 import dashboard.models.user as user
+from dashboard.models.catalog import Catalog
 
 
 class TestUser:
@@ -12,7 +13,7 @@ class TestUser:
             with open(self.fixture_file) as f:
                 self.session_fixture = json.load(f)
 
-            self.good_apps_list = {"apps": []}
+            self.good_apps_list = Catalog("apps: []")
 
             self.u = user.User(session=self.session_fixture, app_config=None)
             self.u.api_token = "foo"
@@ -44,3 +45,9 @@ class TestUser:
     def test_apps(self):
         apps = self.u.apps(self.good_apps_list)
         assert apps == []
+
+    def test_apps_authorized_by_group(self):
+        apps_yml = (Path(__file__).parent.parent / "data" / "apps.yml").read_text()
+        names = [app["application"]["name"] for app in self.u.apps(Catalog(apps_yml))]
+        assert "Account Portal" in names
+        assert "Netlify" not in names
@@ -0,0 +1,52 @@
+from typing import Literal, NotRequired, TypedDict
+
+import pytest
+
+from dashboard.models.apps import AppEntry
+from dashboard.models.validator import compile_validator
+
+
+class Example(TypedDict):
+    name: str
+    enabled: bool
+    kind: Literal["a", "b"]
+    tags: list[str]
+    note: NotRequired[str]
+
+
+application = {
+    "name": "Example",
+    "op": "auth0",
+    "url": "https://example.com",
+    "logo": "example.png",
+    "display": True,
+    "authorized_users": [],
+    "authorized_groups": ["everyone"],
+}
+
+
+def test_typeddict():
+    validate = compile_validator(Example)
+    assert validate({"name": "x", "enabled": False, "kind": "a", "tags": []})
+    assert validate({"name": "x", "enabled": False, "kind": "b", "tags": ["t"], "note": "n"})
+    assert not validate({"name": "x", "enabled": False, "kind": "c", "tags": []})
+    assert not validate({"name": "x", "enabled": "False", "kind": "a", "tags": []})
+    assert not validate({"name": "x", "enabled": False, "kind": "a", "tags": [1]})
+    assert not validate({"name": "x", "enabled": False, "kind": "a"})
+    assert not validate({"name": "x", "enabled": False, "kind": "a", "tags": [], "extra": 1})
+    assert not validate(None)
+
+
+def test_app_entry():
+    validate = compile_validator(AppEntry)
+    assert validate({"application": application})
+    assert validate({"application": {**application, "AAL": "LOW", "vanity_url": ["/example"]}})
+    assert not validate({"application": {**application, "AAL": "BOGUS"}})
+    assert not validate({"application": {**application, "display": "False"}})
+    assert not validate({"application": None})
+    assert not validate("application")
+
+
+def test_unsupported_type():
+    with pytest.raises(TypeError):
+        compile_validator(dict[str, str])
@@ -0,0 +1,168 @@
+import base64
+import json
+import time
+from pathlib import Path
+
+import pytest
+from flask_pyoidc.provider_configuration import ProviderMetadata  # type: ignore
+
+from dashboard.assets import HashedAssets
+from dashboard.models import tile
+from dashboard.models.catalog import Catalog
+from dashboard.worker import EXTENSION
+from dashboard.worker import start
+
+DATA = Path(__file__).parent / "data"
+
+
+@pytest.fixture
+def externals(mocker, monkeypatch):
+    # Internal to how Configs work.
+    monkeypatch.setenv("REDIS_CONNECTOR", "redis://localhost:6379")
+    monkeypatch.setenv("SECRET_KEY", "deadbeef")
+    monkeypatch.setenv("S3_BUCKET", "")
+    monkeypatch.setenv("CDN", "https://cdn.localhost")
+    monkeypatch.setenv(
+        "FORBIDDEN_PAGE_PUBLIC_KEY", base64.b64encode((DATA / "public-signing-key.pem").read_bytes()).decode()
+    )
+    monkeypatch.setenv("OIDC_DOMAIN", "auth.localhost")
+    monkeypatch.setenv("OIDC_CLIENT_ID", "client")
+    monkeypatch.setenv("OIDC_CLIENT_SECRET", "secret")
+    monkeypatch.setenv("OIDC_REDIRECT_URI", "https://localhost:8000/redirect_uri")
+    mocker.patch(
+        "dashboard.oidc_auth.discover",
+        return_value=ProviderMetadata(
+            issuer="https://auth.localhost",
+            authorization_endpoint="https://auth.localhost/authorize",
+            token_endpoint="https://auth.localhost/oauth/token",
+            jwks_uri="https://auth.localhost/.well-known/jwks.json",
+        ),
+    )
+    # Neither the CDN nor dashboard/data are touched, the tests hand the
+    # app its catalog.
+    mocker.patch.object(tile.CDNTransfer, "_load_local_catalog")
+    mocker.patch.object(tile.CDNTransfer, "sync_config")
+    mocker.patch.object(tile.CDNTransfer, "start_refresher")
+    # The bundles would need sass to build.
+    mocker.patch.object(HashedAssets, "urls", return_value=[])
+
+
+@pytest.fixture
+def catalog():
+    return Catalog((DATA / "apps.yml").read_text(), etag="abc123")
+
+
+@pytest.fixture
+def create_app(mocker, externals, fake_redis):
+    # Importing the module builds an app of its own, without a catalog.
+    from dashboard import app as dashboard_app
+
+    def create(catalog=None):
+        mocker.patch.object(tile.CDNTransfer, "_load_local_catalog", new=lambda cdn: setattr(cdn, "catalog", catalog))
+        app = dashboard_app.create_app()
+        app.extensions[EXTENSION].connect = lambda app: fake_redis
+        return app
+
+    return create
+
+
+def test_ready(create_app, catalog):
+    response = create_app(catalog).test_client().get("/ready")
+    assert response.status_code == 200
+    assert response.json == {"status": "ready", "catalog": "stale", "version": catalog.version, "etag": "abc123"}
+    assert response.cache_control.no_store
+
+
+def test_ready_without_a_catalog(create_app):
+    response = create_app().test_client().get("/ready")
+    assert response.status_code == 503
+    assert response.json == {"status": "unavailable"}
+
+
+def test_wrong_method_is_not_a_vanity_url(create_app, catalog):
+    client = create_app(catalog).test_client()
+    response = client.get("/csp_report")
+    assert response.status_code == 405
+    assert response.allow.as_set() == {"post", "options"}
+    assert client.get("/netlify").status_code == 301
+    assert client.get("/not-a-vanity-url").status_code == 404
+
+
+def test_start_without_a_catalog(mocker, create_app, catalog):
+    app = create_app()
+    client = app.test_client()
+    for path in ["/styleguide/dashboard", "/styleguide/api/apps"]:
+        assert client.get(path).status_code == 503
+    assert client.get("/netlify").status_code == 404
+    assert client.get("/about").status_code == 200
+
+    # The first sync with the CDN brings the catalog.
+    cdn = app.extensions[EXTENSION].cdn
+    mocker.patch.object(cdn, "_etag", return_value="abc123")
+    mocker.patch.object(cdn, "_load_compiled_catalog", return_value=catalog)
+    cdn._load_catalog()
+    assert client.get("/ready").status_code == 200
+    assert client.get("/styleguide/api/apps").status_code == 200
+    assert client.get("/netlify").location == "https://some-url-for-netlify"
+
+
+@pytest.fixture
+def client(create_app, catalog, fake_redis):
+    """A client that is logged in as the user in tests/data/userinfo.json."""
+    app = create_app(catalog)
+    start(app)
+    # Flask-Session insists on a redis.Redis, and makes its own otherwise.
+    app.session_interface.client = fake_redis
+    client = app.test_client()
+    claims = json.loads((DATA / "userinfo.json").read_text())
+    with client.session_transaction() as session:
+        session.update(
+            current_provider="default",
+            last_authenticated=int(time.time()),
+            access_token=claims["access_token"],
+            id_token=dict(claims["id_token"], exp=int(time.time()) + 900),
+            userinfo=claims["userinfo"],
+        )
+    return client
+
+
+def test_api_apps(client):
+    response = client.get("/api/apps")
+    assert response.status_code == 200
+    assert response.json["apps"]
+    for tile_json in response.json["apps"]:
+        assert set(tile_json) == {"name", "url", "logo"}
+        assert tile_json["logo"].startswith("https://cdn.localhost/images/")
+    assert response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert "Cookie" in response.vary
+
+
+def test_api_apps_not_modified(client):
+    etag = client.get("/api/apps").headers["ETag"]
+    response = client.get("/api/apps", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert "Cookie" in response.vary
+
+
+def test_api_apps_etag_follows_the_catalog(client):
+    etag = client.get("/api/apps").headers["ETag"]
+    cdn = client.application.extensions[EXTENSION].cdn
+    cdn.catalog = Catalog("apps: []")
+    response = client.get("/api/apps", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json == {"apps": []}
+
+
+def test_dashboard(client):
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    assert b'data-src="/api/apps"' in response.data
+    assert response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client.get("/dashboard", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
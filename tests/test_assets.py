@@ -0,0 +1,94 @@
+import gzip
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from flask_assets import Environment  # type: ignore
+
+from dashboard import assets
+
+STATIC = Path(__file__).parent.parent / "dashboard" / "static"
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    shutil.copytree(STATIC / "js", tmp_path / "js")
+    return tmp_path
+
+
+@pytest.fixture
+def built(static_folder):
+    app = Flask("dashboard", static_folder=str(static_folder))
+    return assets.build(app, names=["js_all"])
+
+
+@pytest.fixture
+def client(static_folder, built):
+    app = Flask("dashboard", static_folder=str(static_folder))
+    environment = assets.register_bundles(Environment(app))
+    app.extensions["hashed_assets"] = assets.HashedAssets(app, environment)
+    return app.test_client()
+
+
+class TestBuild:
+    def test_hashed_name(self):
+        assert assets.hashed_name("js/gen/packed.js", b"a") != assets.hashed_name("js/gen/packed.js", b"b")
+        assert assets.hashed_name("js/gen/packed.js", b"a").startswith("packed.")
+        assert assets.hashed_name("js/gen/packed.js", b"a").endswith(".js")
+
+    def test_build_writes_manifest(self, static_folder, built):
+        gen = static_folder / "gen"
+        assert json.loads((gen / "manifest.json").read_text()) == built
+        content = (gen / built["js_all"]).read_bytes()
+        assert built["js_all"] == assets.hashed_name("packed.js", content)
+        assert gzip.decompress((gen / (built["js_all"] + ".gz")).read_bytes()) == content
+
+    def test_build_is_reproducible(self, static_folder, built):
+        gen = static_folder / "gen"
+        compressed = (gen / (built["js_all"] + ".gz")).read_bytes()
+        app = Flask("dashboard", static_folder=str(static_folder))
+        assert assets.build(app, names=["js_all"]) == built
+        assert (gen / (built["js_all"] + ".gz")).read_bytes() == compressed
+
+
+class TestHashedAssets:
+    def test_urls_from_manifest(self, client, built):
+        with client.application.test_request_context():
+            urls = client.application.jinja_env.globals["asset_urls"]("js_all")
+        assert urls == [f"/static/gen/{built['js_all']}"]
+
+    def test_urls_without_manifest(self, static_folder):
+        app = Flask("dashboard", static_folder=str(static_folder))
+        environment = assets.register_bundles(Environment(app))
+        hashed_assets = assets.HashedAssets(app, environment)
+        assert hashed_assets.manifest == {}
+        with app.test_request_context():
+            assert hashed_assets.urls("js_all") == environment["js_all"].urls()
+
+    def test_immutable(self, client, built):
+        response = client.get(f"/static/gen/{built['js_all']}")
+        assert response.status_code == 200
+        assert response.mimetype == "text/javascript"
+        assert response.content_encoding is None
+        assert response.cache_control.max_age == assets.IMMUTABLE_MAX_AGE
+        assert response.cache_control.immutable
+        assert response.cache_control.public
+        assert "Accept-Encoding" in response.vary
+
+    def test_precompressed(self, client, built, static_folder):
+        response = client.get(f"/static/gen/{built['js_all']}", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.content_encoding == "gzip"
+        assert response.mimetype == "text/javascript"
+        assert gzip.decompress(response.data) == (static_folder / "gen" / built["js_all"]).read_bytes()
+
+    def test_brotli_preferred(self, client, built, static_folder):
+        (static_folder / "gen" / (built["js_all"] + ".br")).write_bytes(b"not really brotli")
+        response = client.get(f"/static/gen/{built['js_all']}", headers={"Accept-Encoding": "gzip, br"})
+        assert response.content_encoding == "br"
+        assert response.data == b"not really brotli"
+
+    def test_missing(self, client):
+        assert client.get("/static/gen/nope.js").status_code == 404
@@ -0,0 +1,113 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+BASE_JS = Path(__file__).parent.parent / "dashboard" / "static" / "js" / "base.js"
+
+# Runs base.js under node against a jQuery that answers every call with itself,
+# then fails the /api/apps request and reports what the page did about it.
+HARNESS = """
+const fs = require('fs');
+const [status, textStatus, reloadedBefore] = JSON.parse(process.argv[1]);
+const result = {reloaded: false, shown: []};
+const storage = {};
+if (reloadedBefore) {
+    storage['app-grid-reloaded'] = '1';
+}
+let fail;
+function chain(selector) {
+    return new Proxy(function() {}, {
+        get(_, prop) {
+            if (prop === 'ready') {
+                return (fn) => fn();
+            }
+            if (prop === 'data') {
+                return () => (selector === '#app-grid' ? '/api/apps' : undefined);
+            }
+            if (prop === 'text') {
+                return (text) => {
+                    result.shown.push([selector, text]);
+                    return chain(selector);
+                };
+            }
+            return () => chain(selector);
+        },
+    });
+}
+global.$ = (arg) => chain(typeof arg === 'string' ? arg : '');
+global.$.getJSON = () => ({fail(fn) {
+    fail = fn;
+    return this;
+}});
+global.document = {};
+global.window = {
+    location: {reload() {
+        result.reloaded = true;
+    }},
+    sessionStorage: {
+        getItem: (key) => storage[key] || null,
+        setItem: (key, value) => {
+            storage[key] = value;
+        },
+        removeItem: (key) => {
+            delete storage[key];
+        },
+    },
+};
+eval(fs.readFileSync(process.argv[2], 'utf8'));
+fail({status}, textStatus);
+result.storage = storage;
+console.log(JSON.stringify(result));
+"""
+
+
+def load_apps_failing(status, text_status, reloaded_before=False):
+    output = subprocess.run(
+        ["node", "-e", HARNESS, json.dumps([status, text_status, reloaded_before]), str(BASE_JS)],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+
+
+@pytest.mark.parametrize(
+    "status, text_status",
+    [
+        (401, "error"),
+        # A redirect to the login page on another origin.
+        (0, "error"),
+        # A redirect to a login page that answers with HTML.
+        (200, "parsererror"),
+    ],
+)
+def test_expired_session_reloads(status, text_status):
+    result = load_apps_failing(status, text_status)
+    assert result["reloaded"]
+    assert result["shown"] == []
+    assert result["storage"] == {"app-grid-reloaded": "1"}
+
+
+def test_expired_session_reloads_only_once():
+    result = load_apps_failing(401, "error", reloaded_before=True)
+    assert not result["reloaded"]
+    assert [selector for selector, _ in result["shown"]] == ['<p class="mui--text-center app-grid-error" role="alert">']
+
+
+def test_error_is_shown_in_the_grid():
+    result = load_apps_failing(503, "error")
+    assert not result["reloaded"]
+    ((selector, text),) = result["shown"]
+    assert "app-grid-error" in selector
+    assert "could not be loaded" in text
+
+
+def test_aborted_request_does_nothing_drastic():
+    result = load_apps_failing(0, "abort")
+    assert not result["reloaded"]
@@ -0,0 +1,51 @@
+import json
+
+from benchmarks import catalog
+from benchmarks.__main__ import main
+from dashboard.models.catalog import Catalog
+from dashboard.models.user import User
+
+
+def test_generated_catalog_is_seeded():
+    assert catalog.generate(100) == catalog.generate(100)
+    assert catalog.generate(100) != catalog.generate(100, seed=1)
+
+
+def test_generated_catalog_is_valid():
+    apps = Catalog(catalog.generate(100))
+    assert len(apps) == 100
+    assert catalog.vanity_url(100) in {url for redirect in apps.vanity_urls for url in redirect}
+
+
+def test_generated_user_sees_some_apps():
+    apps = Catalog(catalog.generate(100))
+    user = User(catalog.session_for(100), app_config=None)
+    assert 0 < len(user.apps(apps)) < len(apps)
+
+
+def test_runner(tmp_path, capsys, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    args = ["-k", "JsonFormatter.format", "--repeat", "1", "--baseline", str(baseline)]
+    monkeypatch.setattr("benchmarks.__main__.measure", lambda func, repeat: 1e-5)
+    assert main(args + ["--save"]) == 0
+    assert json.loads(baseline.read_text()) == {
+        "jsonlog.JsonFormatter.format": 1e-5,
+        "jsonlog.JsonFormatter.format (exception)": 1e-5,
+    }
+    capsys.readouterr()
+
+    # Within the threshold.
+    timings = iter([1.05e-5, 0.9e-5])
+    monkeypatch.setattr("benchmarks.__main__.measure", lambda func, repeat: next(timings))
+    assert main(args) == 0
+    output = capsys.readouterr().out
+    assert "+5.0%" in output
+    assert "slower" not in output
+
+    # The second case twice as slow.
+    timings = iter([1e-5, 2e-5])
+    assert main(args) == 1
+    output = capsys.readouterr().out
+    (slower,) = [line for line in output.splitlines() if line.endswith("  slower")]
+    assert slower.startswith("jsonlog.JsonFormatter.format (exception) ")
+    assert "1 benchmark(s) more than 10.0% slower than the baseline" in output
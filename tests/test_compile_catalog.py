@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+from dashboard.compile_catalog import main
+from dashboard.models.catalog import Catalog
+
+APPS_YML = Path(__file__).parent / "data" / "apps.yml"
+
+invalid = """
+apps:
+  - application:
+      name: "Missing Fields"
+      url: "https://missing.example.com"
+  - application:
+      url: "https://no-name.example.com"
+"""
+
+
+def test_compile(tmp_path, capsys):
+    output = tmp_path / "apps.json"
+    assert main([str(APPS_YML), "-o", str(output)]) == 0
+    catalog = Catalog.from_compiled(output.read_text())
+    assert catalog.version == Catalog(APPS_YML.read_text()).version
+    assert len(catalog) > 0
+    assert "Compiled" in capsys.readouterr().err
+
+
+def test_compile_to_stdout(capsys):
+    assert main([str(APPS_YML)]) == 0
+    assert json.loads(capsys.readouterr().out)["format"] == 2
+
+
+def test_strict(tmp_path, capsys):
+    apps_yml = tmp_path / "apps.yml"
+    apps_yml.write_text(invalid)
+    assert main([str(apps_yml), "-o", str(tmp_path / "apps.json")]) == 0
+    assert main([str(apps_yml), "--strict", "-o", str(tmp_path / "strict.json")]) == 1
+    assert not (tmp_path / "strict.json").exists()
+    assert "2 invalid" in capsys.readouterr().err
+
+
+def test_not_a_catalog(tmp_path, capsys):
+    apps_yml = tmp_path / "apps.yml"
+    apps_yml.write_text("not_apps: []")
+    assert main([str(apps_yml)]) == 1
+    assert "error" in capsys.readouterr().err
@@ -0,0 +1,104 @@
+import importlib
+import socket
+import urllib.request
+
+import pytest
+from flask import Flask
+from flask import abort
+from flask import render_template_string
+from prometheus_client import REGISTRY
+
+from dashboard import gunicorn_conf
+from dashboard import instrumentation
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def client():
+    app = Flask("dashboard")
+    instrumentation.instrument(app)
+
+    @app.route("/hello")
+    def hello():
+        return render_template_string("hello {{ name }}", name="world")
+
+    @app.route("/teapot")
+    def teapot():
+        abort(418)
+
+    return app.test_client()
+
+
+def test_request_metrics(client):
+    before = sample("dashboard_requests_total", method="GET", endpoint="hello", status="200")
+    count = sample("dashboard_request_seconds_count", method="GET", endpoint="hello")
+    assert client.get("/hello").data == b"hello world"
+    assert sample("dashboard_requests_total", method="GET", endpoint="hello", status="200") == before + 1
+    assert sample("dashboard_request_seconds_count", method="GET", endpoint="hello") == count + 1
+
+
+def test_error_and_unmatched_requests(client):
+    teapots = sample("dashboard_requests_total", method="GET", endpoint="teapot", status="418")
+    missing = sample("dashboard_requests_total", method="GET", endpoint="none", status="404")
+    client.get("/teapot")
+    client.get("/no/such/page")
+    assert sample("dashboard_requests_total", method="GET", endpoint="teapot", status="418") == teapots + 1
+    assert sample("dashboard_requests_total", method="GET", endpoint="none", status="404") == missing + 1
+
+
+def test_template_metrics(client):
+    before = sample("dashboard_template_render_seconds_count", template="<string>")
+    client.get("/hello")
+    assert sample("dashboard_template_render_seconds_count", template="<string>") == before + 1
+
+
+def test_metrics_listener(client):
+    client.get("/hello")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    instrumentation.serve_metrics(port)
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        assert response.headers.get_content_type() == "text/plain"
+        assert b'dashboard_request_seconds_bucket{endpoint="hello"' in response.read()
+
+
+def test_no_public_metrics(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_multiprocess_registry(monkeypatch, tmp_path):
+    assert instrumentation.registry() is REGISTRY
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert instrumentation.registry() is not REGISTRY
+
+
+def test_gunicorn_clears_multiprocess_dir(monkeypatch, tmp_path):
+    (tmp_path / "counter_1234.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    gunicorn_conf.clear_multiprocess_dir()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_gunicorn_clears_multiprocess_dir_when_loaded(monkeypatch, tmp_path):
+    # Gunicorn loads its config before preloading the app.
+    (tmp_path / "counter_1234.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    importlib.reload(gunicorn_conf)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_gunicorn_serves_metrics(mocker, monkeypatch):
+    mocker.patch("gc.freeze")
+    serve_metrics = mocker.patch.object(gunicorn_conf, "serve_metrics")
+    monkeypatch.setenv("METRICS_PORT", "9123")
+    gunicorn_conf.when_ready(server=None)
+    serve_metrics.assert_called_once_with(9123, "127.0.0.1")
+
+    serve_metrics.reset_mock()
+    monkeypatch.setenv("METRICS_PORT", "")
+    gunicorn_conf.when_ready(server=None)
+    serve_metrics.assert_not_called()
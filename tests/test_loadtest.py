@@ -0,0 +1,41 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from loadtest import driver
+from loadtest import stubs
+
+
+def test_percentiles():
+    result = driver.Result(latencies=[i / 1000 for i in range(1, 101)], elapsed=2.0)
+    assert result.rps == 50
+    assert result.percentile(50) == 0.05
+    assert result.percentile(99) == 0.099
+    assert result.percentile(100) == 0.1
+    assert driver.Result().percentile(50) == 0
+
+
+@pytest.fixture
+def cdn():
+    cdn = stubs.StubCDN("apps: []\n").start()
+    yield cdn
+    cdn.stop()
+
+
+def test_stub_cdn(cdn):
+    with urllib.request.urlopen(f"{cdn.url}/apps.yml") as response:
+        assert response.read() == b"apps: []\n"
+        etag = response.headers["ETag"]
+    request = urllib.request.Request(f"{cdn.url}/apps.yml", headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        urllib.request.urlopen(request)
+    assert exc.value.code == 304
+
+
+def test_driver(cdn):
+    result = driver.run("127.0.0.1", cdn.port, lambda: [driver.Request("/apps.yml", 200)], 2, 0.2)
+    assert result.latencies
+    assert result.errors == 0
+    result = driver.run("127.0.0.1", cdn.port, lambda: [driver.Request("/nope", 200)], 1, 0.1)
+    assert result.errors == len(result.latencies)
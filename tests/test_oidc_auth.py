@@ -1,6 +1,6 @@
 from pathlib import Path
 import json
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat, PublicFormat
 from josepy.jwk import JWK
 from josepy.jws import JWS
@@ -73,3 +73,37 @@ class TestInvalidOidcAuth:
             ).to_compact()
             tv = oidc_auth.TokenVerification(jws, self.public_key)
             assert tv.error_message() is not None, f"couldn't generate message for {error_code}"
+
+
+class TestTokenVerificationCache:
+    def setup_method(self):
+        data = Path(__file__).parent / "data"
+        self.public_key = (data / "public-signing-key.pem").read_bytes()
+        self.sample_json_web_token = (data / "mfa-required-jwt").read_text().encode()
+
+    def test_cached_verification(self, mocker):
+        cache = oidc_auth.TokenVerificationCache(self.public_key, maxsize=2)
+        tv = cache.verify(self.sample_json_web_token)
+        assert tv.signed(), "Could not verify JWS"
+        verification = mocker.patch("dashboard.oidc_auth.TokenVerification")
+        assert cache.verify(self.sample_json_web_token) is tv
+        verification.assert_not_called()
+
+    def test_invalid_jws_is_not_cached(self):
+        cache = oidc_auth.TokenVerificationCache(self.public_key, maxsize=2)
+        for _ in range(2):
+            with pytest.raises(oidc_auth.TokenError):
+                cache.verify(b"not a jws")
+        assert len(cache.cache) == 0
+
+    def test_bad_signature_is_not_cached(self):
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048).public_key()
+        cache = oidc_auth.TokenVerificationCache(
+            other_key.public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo), maxsize=2
+        )
+        tv = cache.verify(self.sample_json_web_token)
+        assert tv.error_code == "invalid"
+        assert len(cache.cache) == 0
+
+    def test_public_key_parsed_once(self):
+        assert oidc_auth.load_public_key(self.public_key) is oidc_auth.load_public_key(self.public_key)
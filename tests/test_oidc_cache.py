@@ -0,0 +1,126 @@
+import time
+
+import pytest
+import requests
+from oic.utils.keyio import KeyBundle
+from oic.utils.keyio import KeyJar
+from oic.utils.keyio import UpdateFailed
+
+from dashboard import oidc_cache
+
+ISSUER = "https://auth.example.com"
+JWKS_URI = f"{ISSUER}/.well-known/jwks.json"
+DOCUMENT = {
+    "issuer": f"{ISSUER}/",
+    "authorization_endpoint": f"{ISSUER}/authorize",
+    "token_endpoint": f"{ISSUER}/oauth/token",
+    "jwks_uri": JWKS_URI,
+}
+JWKS = {"keys": [{"kty": "oct", "kid": "one", "k": "c2VjcmV0"}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return oidc_cache.DiskCache(str(tmp_path / "oidc"), ttl=60)
+
+
+@pytest.fixture
+def provider(mocker):
+    get = mocker.patch("requests.get")
+    get.return_value.json.return_value = DOCUMENT
+    return get
+
+
+def test_disk_cache(cache):
+    assert cache.get("thing") is None
+    fetched_at = cache.set("thing", {"a": 1})
+    assert cache.get("thing") == (fetched_at, {"a": 1})
+    assert cache.is_fresh(fetched_at)
+    assert not cache.is_fresh(fetched_at - 60)
+
+
+def test_disk_cache_ignores_broken_entries(cache):
+    cache.set("thing", {"a": 1})
+    with open(cache._path("thing"), "w") as file:
+        file.write("{")
+    assert cache.get("thing") is None
+
+
+def test_discover_once(provider, cache):
+    assert oidc_cache.discover(ISSUER, cache, timeout=1)["jwks_uri"] == JWKS_URI
+    assert oidc_cache.discover(ISSUER, cache, timeout=1)["jwks_uri"] == JWKS_URI
+    provider.assert_called_once_with(f"{ISSUER}/.well-known/openid-configuration", timeout=1)
+
+
+def test_discover_again_once_stale(mocker, provider, cache):
+    oidc_cache.discover(ISSUER, cache, timeout=1)
+    mocker.patch.object(cache, "is_fresh", return_value=False)
+    oidc_cache.discover(ISSUER, cache, timeout=1)
+    assert provider.call_count == 2
+
+
+def test_discover_falls_back_to_the_cache(mocker, provider, cache):
+    oidc_cache.discover(ISSUER, cache, timeout=1)
+    mocker.patch.object(cache, "is_fresh", return_value=False)
+    provider.side_effect = requests.Timeout
+    assert oidc_cache.discover(ISSUER, cache, timeout=1)["jwks_uri"] == JWKS_URI
+
+
+def test_discover_without_a_cache(provider, cache):
+    provider.side_effect = requests.ConnectionError
+    with pytest.raises(requests.ConnectionError):
+        oidc_cache.discover(ISSUER, cache, timeout=1)
+
+
+def test_discover_checks_the_issuer(provider, cache):
+    provider.return_value.json.return_value = dict(DOCUMENT, issuer="https://evil.example.com/")
+    with pytest.raises(ValueError):
+        oidc_cache.discover(ISSUER, cache, timeout=1)
+
+
+def fetched(mocker):
+    def do_remote(self):
+        self.imp_jwks = JWKS
+        self.do_keys(JWKS["keys"])
+        self.last_updated = time.time()
+        return True
+
+    return mocker.patch.object(KeyBundle, "do_remote", autospec=True, side_effect=do_remote)
+
+
+def test_keys_are_shared(mocker, cache):
+    remote = fetched(mocker)
+    first = oidc_cache.SharedKeyBundle(cache, source=JWKS_URI)
+    second = oidc_cache.SharedKeyBundle(cache, source=JWKS_URI)
+    assert [key.kid for key in first.keys()] == ["one"]
+    assert [key.kid for key in second.keys()] == ["one"]
+    assert remote.call_count == 1
+
+
+def test_forced_update_goes_to_the_provider(mocker, cache):
+    remote = fetched(mocker)
+    oidc_cache.SharedKeyBundle(cache, source=JWKS_URI).keys()
+    bundle = oidc_cache.SharedKeyBundle(cache, source=JWKS_URI)
+    bundle.keys()
+    assert remote.call_count == 1
+    bundle.update()
+    assert remote.call_count == 2
+
+
+def test_keys_fall_back_to_the_cache(mocker, cache):
+    cache.set(JWKS_URI, JWKS)
+    mocker.patch.object(cache, "is_fresh", return_value=False)
+    mocker.patch.object(KeyBundle, "do_remote", side_effect=UpdateFailed("unreachable"))
+    assert [key.kid for key in oidc_cache.SharedKeyBundle(cache, source=JWKS_URI).keys()] == ["one"]
+
+
+def test_share_keys(cache):
+    keyjar = KeyJar()
+    keyjar.add(ISSUER, JWKS_URI)
+    local = KeyBundle(keys=JWKS["keys"])
+    keyjar.add_kb(ISSUER, local)
+    oidc_cache.share_keys(keyjar, cache)
+    remote, kept = keyjar.issuer_keys[ISSUER]
+    assert isinstance(remote, oidc_cache.SharedKeyBundle)
+    assert remote.source == JWKS_URI
+    assert kept is local
@@ -0,0 +1,60 @@
+import pytest
+from flask import Flask
+
+from dashboard.precomputed import PrecomputedResponse
+
+
+@pytest.fixture
+def renders():
+    return []
+
+
+@pytest.fixture
+def client(renders):
+    def render():
+        renders.append(1)
+        return "<p>hello</p>"
+
+    page = PrecomputedResponse(render)
+    missing = PrecomputedResponse(lambda: "<p>not here</p>", status=404)
+    app = Flask("dashboard")
+    app.add_url_rule("/page", "page", page)
+    app.add_url_rule("/missing", "missing", missing)
+    return app.test_client()
+
+
+def test_rendered_once(client, renders):
+    assert client.get("/page").data == b"<p>hello</p>"
+    assert client.get("/page").data == b"<p>hello</p>"
+    assert len(renders) == 1
+
+
+def test_etag(client):
+    response = client.get("/page")
+    assert response.status_code == 200
+    assert response.mimetype == "text/html"
+    etag, weak = response.get_etag()
+    assert etag and not weak
+
+
+def test_not_modified(client):
+    etag, _ = client.get("/page").get_etag()
+    response = client.get("/page", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b""
+    response = client.get("/page", headers={"If-None-Match": '"something-else"'})
+    assert response.status_code == 200
+
+
+def test_error_status(client):
+    response = client.get("/missing")
+    assert response.status_code == 404
+    assert response.data == b"<p>not here</p>"
+    assert response.get_etag() == (None, None)
+    assert client.get("/missing", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_bytes_body():
+    page = PrecomputedResponse(lambda: b'{"a":1}', mimetype="application/json")
+    assert page.body == b'{"a":1}'
+    assert len(page.etag) == 32
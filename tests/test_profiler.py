@@ -0,0 +1,112 @@
+import pytest
+from flask import Flask
+
+from dashboard import profiler
+
+SECRET_KEY = "deadbeef"
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    def make_client(enabled=True, keep=50):
+        app = Flask("dashboard")
+        app.config.update(
+            SECRET_KEY=SECRET_KEY,
+            PROFILER_ENABLED=enabled,
+            PROFILER_DIR=str(tmp_path),
+            PROFILER_TOKEN_MAX_AGE=60,
+            PROFILER_KEEP=keep,
+        )
+        profiler.Profiler(app).setup()
+
+        @app.route("/hello")
+        def hello():
+            return "hello"
+
+        return app.test_client()
+
+    return make_client
+
+
+@pytest.fixture
+def token():
+    return {profiler.HEADER: profiler.make_token(SECRET_KEY)}
+
+
+def test_disabled_registers_nothing(make_client, token, tmp_path):
+    client = make_client(enabled=False)
+    app = client.application
+    assert not app.before_request_funcs
+    assert not app.after_request_funcs
+    assert "profile" not in app.view_functions
+    response = client.get("/hello", headers=token)
+    assert profiler.ID_HEADER not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_requests_without_a_token_are_not_profiled(make_client, tmp_path):
+    client = make_client()
+    assert profiler.ID_HEADER not in client.get("/hello").headers
+    bad = {profiler.HEADER: profiler.make_token("not the secret key")}
+    assert profiler.ID_HEADER not in client.get("/hello", headers=bad).headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_and_download(make_client, token, tmp_path):
+    client = make_client()
+    response = client.get("/hello", headers=token)
+    assert response.data == b"hello"
+    name = response.headers[profiler.ID_HEADER]
+    assert "-hello-" in name
+    assert (tmp_path / name).is_file()
+
+    download = client.get(f"/_profiles/{name}", headers=token)
+    assert download.status_code == 200
+    assert download.data == (tmp_path / name).read_bytes()
+
+    text = client.get(f"/_profiles/{name}?format=text", headers=token)
+    assert text.status_code == 200
+    assert b"function calls" in text.data
+
+
+def test_download_needs_a_token(make_client, token):
+    client = make_client()
+    name = client.get("/hello", headers=token).headers[profiler.ID_HEADER]
+    assert client.get(f"/_profiles/{name}").status_code == 404
+    assert client.get("/_profiles/..%2Fetc%2Fpasswd?format=text", headers=token).status_code == 404
+
+
+def test_old_profiles_are_pruned(make_client, token, tmp_path):
+    client = make_client(keep=2)
+    for _ in range(4):
+        client.get("/hello", headers=token)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_one_profile_at_a_time(make_client, token, tmp_path):
+    client = make_client()
+    other = make_client()
+
+    @client.application.route("/overlap")
+    def overlap():
+        # Another profiled request, served while this one is being profiled.
+        response = other.get("/hello", headers=token)
+        assert response.status_code == 200
+        return response.headers.get(profiler.ID_HEADER, "not profiled")
+
+    response = client.get("/overlap", headers=token)
+    assert response.data == b"not profiled"
+    assert [path.name for path in tmp_path.iterdir()] == [response.headers[profiler.ID_HEADER]]
+    assert profiler.ID_HEADER in other.get("/hello", headers=token).headers
+
+
+def test_profiling_stops_on_unhandled_errors(make_client, token):
+    client = make_client()
+
+    @client.application.route("/error")
+    def error():
+        raise RuntimeError("oops")
+
+    client.application.testing = False
+    assert client.get("/error", headers=token).status_code == 500
+    assert profiler.ID_HEADER in client.get("/hello", headers=token).headers
@@ -0,0 +1,50 @@
+import pytest
+import redis
+from prometheus_client import REGISTRY
+
+from dashboard import redis_pool
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_connect_with_url():
+    client = redis_pool.connect("redis://localhost:6379/0", max_connections=3, timeout=1, health_check_interval=30)
+    pool = client.connection_pool
+    assert isinstance(client, redis_pool.InstrumentedRedis)
+    assert isinstance(pool, redis_pool.InstrumentedConnectionPool)
+    assert pool.max_connections == 3
+    assert pool.timeout == 1
+    assert pool.connection_kwargs["health_check_interval"] == 30
+
+
+def test_connect_with_host_port():
+    client = redis_pool.connect("localhost:6379", max_connections=3)
+    assert client.connection_pool.connection_kwargs["host"] == "localhost"
+    assert client.connection_pool.connection_kwargs["port"] == 6379
+
+
+def test_command_latency(mocker):
+    mocker.patch("redis.Redis.execute_command", return_value=b"value")
+    client = redis_pool.InstrumentedRedis()
+    before = sample("dashboard_redis_command_seconds_count", command="GET")
+    assert client.get("key") == b"value"
+    assert sample("dashboard_redis_command_seconds_count", command="GET") == before + 1
+
+
+def test_command_errors(mocker):
+    mocker.patch("redis.Redis.execute_command", side_effect=redis.ConnectionError)
+    client = redis_pool.InstrumentedRedis()
+    before = sample("dashboard_redis_command_errors_total", command="SET")
+    with pytest.raises(redis.ConnectionError):
+        client.set("key", "value")
+    assert sample("dashboard_redis_command_errors_total", command="SET") == before + 1
+
+
+def test_pool_wait(mocker):
+    mocker.patch("redis.BlockingConnectionPool.get_connection")
+    pool = redis_pool.InstrumentedConnectionPool()
+    before = sample("dashboard_redis_pool_wait_seconds_count")
+    pool.get_connection("GET")
+    assert sample("dashboard_redis_pool_wait_seconds_count") == before + 1
@@ -0,0 +1,154 @@
+import datetime
+import json
+from pathlib import Path
+
+import pytest
+import redis
+from flask import Flask
+from flask import request
+from flask import session
+
+from dashboard import sessions
+from dashboard.metrics import SESSION_OVERSIZED
+
+
+@pytest.fixture
+def session_data():
+    with open(Path(__file__).parent / "data" / "userinfo.json") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def dashboard_app():
+    app = Flask("dashboard")
+    app.config.update(
+        SESSION_TRIM_CLAIMS=True,
+        SESSION_SERIALIZATION_FORMAT="msgpack",
+        SESSION_SIZE_WARNING=1024,
+        SESSION_TTL_REFRESH_INTERVAL=600,
+    )
+
+    @app.route("/read")
+    def read():
+        return session.get("userinfo", {}).get("sub", "")
+
+    @app.route("/write")
+    def write():
+        session["userinfo"] = {"sub": request.args["sub"]}
+        session["userinfo"]["user_id"] = request.args["sub"]
+        return ""
+
+    return app
+
+
+@pytest.fixture
+def interface(mocker, dashboard_app):
+    interface = sessions.CompactRedisSessionInterface(dashboard_app, client=redis.Redis())
+    mocker.patch.object(interface, "client")
+    return interface
+
+
+def stored(interface):
+    return interface.serializer.decode(interface.client.set.call_args.kwargs["value"])
+
+
+def test_trim_claims(session_data):
+    trimmed = sessions.trim_claims(session_data)
+    assert set(trimmed["userinfo"]) <= sessions.USERINFO_CLAIMS
+    assert trimmed["userinfo"]["email"] == session_data["userinfo"]["email"]
+    assert trimmed["userinfo"]["https://sso.mozilla.com/claim/groups"]
+    assert set(trimmed["id_token"]) <= sessions.ID_TOKEN_CLAIMS
+    assert trimmed["access_token"] == session_data["access_token"]
+    # The original is left alone.
+    assert "picture" in session_data["userinfo"]
+
+
+def test_upsert_trimmed_session(interface, session_data):
+    session = interface.session_class(session_data, sid="sid")
+    interface._upsert_session(datetime.timedelta(seconds=60), session, "session:sid")
+    assert interface.client.set.call_args.kwargs["ex"] == 60
+    data = stored(interface)
+    assert data.pop("_refreshed_at")
+    assert data == sessions.trim_claims(session_data)
+
+
+def test_upsert_untrimmed_session(interface, session_data):
+    interface.trim_claims = False
+    session = interface.session_class(session_data, sid="sid")
+    interface._upsert_session(datetime.timedelta(seconds=60), session, "session:sid")
+    data = stored(interface)
+    assert data.pop("_refreshed_at")
+    assert data == session_data
+
+
+def test_oversized_session(interface, session_data):
+    before = SESSION_OVERSIZED._value.get()
+    interface.trim_claims = False
+    session = interface.session_class(session_data, sid="sid")
+    interface._upsert_session(datetime.timedelta(seconds=60), session, "session:sid")
+    assert SESSION_OVERSIZED._value.get() == before + 1
+
+
+class TestWriteElision:
+    @pytest.fixture
+    def client(self, dashboard_app, interface, fake_redis):
+        interface.client = fake_redis
+        dashboard_app.session_interface = interface
+        return dashboard_app.test_client()
+
+    def test_unchanged_session_is_not_written(self, client, interface):
+        client.get("/write?sub=jdoe")
+        assert interface.client.writes == 1
+        assert client.get("/read").data == b"jdoe"
+        # Same values as before, so nothing to write.
+        client.get("/write?sub=jdoe")
+        assert interface.client.writes == 1
+
+    def test_changed_session_is_written(self, client, interface):
+        client.get("/write?sub=jdoe")
+        client.get("/write?sub=someone-else")
+        assert interface.client.writes == 2
+        assert client.get("/read").data == b"someone-else"
+
+    def test_ttl_refresh(self, mocker, client, interface):
+        now = mocker.patch("time.time", return_value=1_000_000)
+        client.get("/write?sub=jdoe")
+        assert interface.client.writes == 1
+        now.return_value += 599
+        client.get("/read")
+        assert interface.client.writes == 1
+        now.return_value += 1
+        client.get("/read")
+        assert interface.client.writes == 2
+
+    def test_empty_session_is_not_written(self, client, interface):
+        client.get("/read")
+        assert interface.client.writes == 0
+
+
+class TestSessionless:
+    @pytest.fixture
+    def client(self, dashboard_app, interface, fake_redis):
+        @dashboard_app.route("/sessionless")
+        @sessions.sessionless
+        def no_session():
+            return "ok"
+
+        interface.client = fake_redis
+        dashboard_app.session_interface = interface
+        client = dashboard_app.test_client()
+        client.get("/write?sub=jdoe")
+        interface.client.get = lambda key: pytest.fail("should not have loaded the session")
+        return client
+
+    def test_sessionless_view(self, client):
+        assert client.get("/sessionless").data == b"ok"
+
+    def test_static_and_not_found(self, client):
+        client.get("/static/nothing-here.css")
+        assert client.get("/not-a-route").status_code == 404
+
+    def test_no_url_adapter(self, dashboard_app, interface):
+        with dashboard_app.test_request_context("/sessionless"):
+            dashboard_app.create_url_adapter = lambda request: None
+            assert not interface._is_sessionless(dashboard_app, request)
@@ -4,6 +4,7 @@ from flask import Flask
 from dashboard import config
 from dashboard import vanity
 from dashboard.models import tile
+from dashboard.models.catalog import Catalog
 from dashboard.op import yaml_loader
 
 
@@ -36,7 +37,8 @@ def dashboard_app(app_config):
 
 
 @pytest.fixture
-def cdn(app_config):
+def cdn(mocker, app_config):
+    mocker.patch.object(tile.CDNTransfer, "_write_compiled_catalog")
     return tile.CDNTransfer(app_config)
 
 
@@ -51,3 +53,37 @@ class TestVanity:
         router.setup()
         response = client.get("/netlify")
         assert response.location == "https://some-url-for-netlify", "Did not properly redirect vanity URL"
+
+    def test_router_follows_catalog_updates(self, dashboard_app, cdn, client):
+        router = vanity.Router(dashboard_app, cdn)
+        router.setup()
+        router.reload(Catalog(cdn.apps_yml.replace("https://some-url-for-netlify", "https://netlify.example.com")))
+        response = client.get("/netlify")
+        assert response.location == "https://netlify.example.com", "Did not pick up the new catalog"
+
+    def test_router_adds_new_urls(self, dashboard_app, cdn, client):
+        router = vanity.Router(dashboard_app, cdn)
+        router.setup()
+        assert client.get("/netlify/").location == "https://some-url-for-netlify"
+        router.reload(Catalog(cdn.apps_yml.replace("/netlify", "/some-new-vanity-url")))
+        assert client.get("/some-new-vanity-url").location == "https://some-url-for-netlify"
+        assert client.get("/netlify").status_code == 404
+
+    def test_router_without_a_catalog(self, dashboard_app, cdn, client):
+        catalog = cdn.catalog
+        cdn.catalog = None
+        router = vanity.Router(dashboard_app, cdn)
+        router.setup()
+        assert client.get("/netlify").status_code == 404
+        cdn._load_catalog()
+        assert cdn.catalog is not catalog
+        assert client.get("/netlify").location == "https://some-url-for-netlify"
+
+    def test_router_leaves_other_routes_alone(self, dashboard_app, cdn, client):
+        dashboard_app.add_url_rule("/report", "report", lambda: "", methods=["POST"])
+        router = vanity.Router(dashboard_app, cdn)
+        router.setup()
+        assert client.get("/report").status_code == 405
+        assert client.post("/report").status_code == 200
+        assert client.post("/netlify").status_code == 405
+        assert client.get("/netlify").status_code == 301
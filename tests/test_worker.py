@@ -0,0 +1,85 @@
+import pytest
+import redis
+from flask import Flask
+from flask import session
+
+from dashboard import gunicorn_conf
+from dashboard import worker
+from dashboard.sessions import CompactRedisSessionInterface
+
+
+@pytest.fixture
+def dashboard_app():
+    app = Flask("dashboard")
+    app.config.update(
+        TILE_CACHE_TTL=60,
+        SESSION_TRIM_CLAIMS=True,
+        SESSION_SERIALIZATION_FORMAT="msgpack",
+        SESSION_SIZE_WARNING=1024,
+        SESSION_TTL_REFRESH_INTERVAL=600,
+    )
+
+    @app.route("/")
+    def index():
+        return type(session._get_current_object()).__name__
+
+    return app
+
+
+@pytest.fixture
+def cdn(mocker):
+    return mocker.Mock()
+
+
+@pytest.fixture
+def connect(mocker):
+    return mocker.Mock(side_effect=lambda app: mocker.Mock(spec=redis.Redis))
+
+
+def test_nothing_until_started(dashboard_app, cdn, connect):
+    worker.Worker(dashboard_app, cdn, connect)
+    connect.assert_not_called()
+    cdn.connect.assert_not_called()
+    cdn.start_refresher.assert_not_called()
+
+
+def test_start(dashboard_app, cdn, connect):
+    dashboard_worker = worker.Worker(dashboard_app, cdn, connect)
+    worker.start(dashboard_app)
+    assert isinstance(dashboard_app.session_interface, CompactRedisSessionInterface)
+    assert dashboard_app.session_interface.client is dashboard_worker.tile_cache.client
+    assert dashboard_worker.tile_cache.ttl == 60
+    cdn.connect.assert_called_once()
+    cdn.start_refresher.assert_called_once()
+
+
+def test_started_once_per_process(mocker, dashboard_app, cdn, connect):
+    dashboard_worker = worker.Worker(dashboard_app, cdn, connect)
+    dashboard_worker.start()
+    dashboard_worker.start()
+    assert connect.call_count == 1
+    client = dashboard_worker.tile_cache.client
+
+    # As seen from a forked worker.
+    mocker.patch("os.getpid", return_value=dashboard_worker.pid + 1)
+    dashboard_worker.start()
+    assert connect.call_count == 2
+    assert dashboard_worker.tile_cache.client is not client
+    assert cdn.start_refresher.call_count == 2
+
+
+def test_started_before_the_session_is_opened(dashboard_app, cdn, connect):
+    worker.Worker(dashboard_app, cdn, connect)
+    response = dashboard_app.test_client().get("/")
+    assert response.data == b"RedisSession"
+    connect.assert_called_once_with(dashboard_app)
+
+
+def test_start_without_a_worker():
+    worker.start(Flask("dashboard"))
+
+
+def test_gunicorn_starts_the_worker(mocker, dashboard_app, cdn, connect):
+    dashboard_worker = worker.Worker(dashboard_app, cdn, connect)
+    gunicorn_conf.post_worker_init(mocker.Mock(wsgi=dashboard_app))
+    assert dashboard_worker.pid is not None